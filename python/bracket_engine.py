@@ -0,0 +1,177 @@
+import copy
+import numpy as np
+import pandas as pd
+
+from playoff_bracket import generate_playoff_bracket, print_bracket
+from win_matrix import WinMatrix
+
+
+
+class ArrayBracket:
+    """
+    Reseeded playoff bracket over integer team indices, for playing many
+    brackets at once.
+
+    Teams are numbered in `generate_playoff_bracket`'s `team_info` order with
+    their seeds, conferences and years held in arrays. A batch of brackets
+    is a `brackets x teams` alive mask. Every round pairs each bracket's alive
+    teams by seed with array indexing, since how many teams are left in each
+    conference after each round does not depend on who won.
+    """
+
+    def __init__(self, conferences: dict, byes_per_conf: dict):
+        self.layout = generate_playoff_bracket(copy.deepcopy(conferences), byes_per_conf, reseed=True)
+        self.ids = list(self.layout["team_info"])
+        self.conferences = list(self.layout["conferences"])
+        self.num_rounds = self.layout["num_rounds"]
+
+        info = [self.layout["team_info"][team] for team in self.ids]
+        self.seeds = np.array([seed for seed, _, _ in info])
+        self.conf = np.array([self.conferences.index(conf) for _, conf, _ in info])
+        self.years = np.array([year for _, _, year in info])
+        self.index = {team: i for i, team in enumerate(self.ids)}
+        self.byes = np.zeros(len(self.ids), dtype=bool)
+        self.byes[[self.index[team] for team, _ in self.layout["rounds"][1]["teams_with_byes"]]] = True
+
+        # Teams of each conference best seed first, and of the whole field for the final
+        self.members = [np.array(sorted(np.flatnonzero(self.conf == c), key=lambda i: self.seeds[i])) for c in range(len(self.conferences))]
+        self.final_order = np.array(sorted(range(len(self.ids)), key=lambda i: (self.seeds[i], self.conf[i])))
+
+
+
+    def probabilities(self, matrix: WinMatrix) -> np.ndarray:
+        """
+        `matrix.probability` reordered to this bracket's team indices.
+        """
+        order = [matrix.index[team] for team in self.ids]
+        return matrix.probability[np.ix_(order, order)]
+
+
+
+    def _pair(self, alive: np.ndarray, members: np.ndarray, count: int, probability: np.ndarray, rng: np.random.Generator) -> dict[str, np.ndarray]:
+        # Alive members in seed order, best against worst, the odd one out advances
+        field = members[np.argsort(~alive[:, members], axis=1, kind='stable')[:, :count]]
+        games = count // 2
+        team1 = field[:, :games]
+        team2 = field[:, ::-1][:, :games]
+
+        won = rng.random(team1.shape) < probability[team1, team2]
+        winner = np.where(won, team1, team2)
+        rows = np.arange(len(alive))[:, None]
+        alive[rows, np.where(won, team2, team1)] = False
+
+        if count % 2 == 1:
+            middle = field[:, games:games + 1]
+            team1 = np.hstack((team1, middle))
+            team2 = np.hstack((team2, np.full_like(middle, -1)))
+            winner = np.hstack((winner, middle))
+
+        return {'team1': team1, 'team2': team2, 'winner': winner}
+
+
+
+    def play(self, probability: np.ndarray, brackets: int, rng: np.random.Generator) -> list[dict]:
+        """
+        Play `brackets` brackets, drawing every game from `probability`, the
+        chance the row team beats the column team.
+
+        Returns:
+            For every round, `team1`, `team2` (-1 for an automatic win) and
+            `winner` arrays of `brackets x matchups` team indices, plus the
+            `conference` of every matchup (None in the final)
+        """
+        alive = np.ones((brackets, len(self.ids)), dtype=bool)
+        counts = [int(np.sum(~self.byes[members])) for members in self.members]
+        rounds = []
+
+        for rnd in range(1, self.num_rounds + 1):
+            if rnd == self.num_rounds and rnd > 1:
+                count = min(2, int(alive[0].sum()))
+                played = self._pair(alive, self.final_order, count, probability, rng)
+                alive[:] = False
+                alive[np.arange(brackets)[:, None], played['winner']] = True
+                played['conference'] = [None] * played['winner'].shape[1]
+                rounds.append(played)
+                continue
+
+            # Byes sit out the first round
+            playing = alive & ~self.byes if rnd == 1 else alive
+            parts = []
+            conferences = []
+            for c, members in enumerate(self.members):
+                count = counts[c] if rnd == 1 else int(alive[0, members].sum())
+                part = self._pair(playing, members, count, probability, rng)
+                alive[:, members] &= playing[:, members] | self.byes[members]
+                parts.append(part)
+                conferences += [self.conferences[c]] * part['winner'].shape[1]
+
+            played = {key: np.hstack([part[key] for part in parts]) for key in ('team1', 'team2', 'winner')}
+            played['conference'] = conferences
+            rounds.append(played)
+
+        return rounds
+
+
+
+    def advancement(self, rounds: list[dict]) -> np.ndarray:
+        """
+        How many of the played brackets each team was in every round of, and
+        won, as a `teams x (rounds + 1)` array.
+        """
+        counts = np.zeros((len(self.ids), self.num_rounds + 1), dtype=np.int64)
+        counts[:, 0] += self.byes * len(rounds[0]['winner'])
+
+        for rnd, played in enumerate(rounds):
+            teams = np.concatenate((played['team1'].ravel(), played['team2'].ravel()))
+            counts[:, rnd] += np.bincount(teams[teams >= 0], minlength=len(self.ids))
+
+        final = rounds[-1]
+        if final['conference'] and final['conference'][0] is None:
+            counts[:, -1] = np.bincount(final['winner'][:, 0], minlength=len(self.ids))
+
+        return counts
+
+
+
+    def tournament(self, matrix: WinMatrix, brackets: int = 1_000_000, seed: int = None, chunk: int = 100_000) -> pd.DataFrame:
+        """
+        `simulate_tournament` on the array engine, played `chunk` brackets at
+        a time to bound memory.
+        """
+        probability = self.probabilities(matrix)
+        rng = np.random.default_rng(seed)
+        counts = np.zeros((len(self.ids), self.num_rounds + 1), dtype=np.int64)
+
+        for start in range(0, brackets, chunk):
+            counts += self.advancement(self.play(probability, min(chunk, brackets - start), rng))
+
+        columns = [f"round_{rnd}" for rnd in range(1, self.num_rounds + 1)] + ["champion"]
+        odds = pd.DataFrame(counts / brackets, index=pd.Index(self.ids, name="team"), columns=columns)
+        return odds.sort_values(["champion"] + columns[::-1], ascending=False)
+
+
+
+    def to_dict(self, rounds: list[dict], bracket: int = 0) -> dict:
+        """
+        One played bracket in the `generate_playoff_bracket` dict format, as
+        `update_bracket` would have left it.
+        """
+        result = copy.deepcopy(self.layout)
+        for rnd, played in enumerate(rounds, start=1):
+            matchups = []
+            for team1, team2, winner, conf in zip(played['team1'][bracket].tolist(), played['team2'][bracket].tolist(), played['winner'][bracket].tolist(), played['conference']):
+                matchups.append({
+                    "team1": self.ids[team1],
+                    "team2": self.ids[team2] if team2 >= 0 else None,
+                    "conference": conf,
+                    "winner": self.ids[winner]
+                })
+
+            result["rounds"][rnd]["matchups"] = matchups
+
+        return result
+
+
+
+    def print_bracket(self, rounds: list[dict], bracket: int = 0) -> None:
+        print_bracket(self.to_dict(rounds, bracket))
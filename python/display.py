@@ -1,8 +1,16 @@
+import numpy as np
 import pandas as pd
 
-from special import pct
+from special import pct, pct_batch
 from IPython.display import display
 
+TEAM_RANKING_COLUMNS = [
+        "Team", "Year", "Wins", "Losses", "Ties", "Win%", "Team STRS", "Offense SORS", "Defense SDRS", 'Diff',
+        "Off FP", "Def FP", 'NP',
+        "PF", "PA"
+]
+
+
 
 class Display:
 
@@ -35,13 +43,50 @@ class Display:
     
 
 
-    def display_team_rankings(self, final_results: list[list]) -> None:
-        columns = [
-                "Team", "Year", "Wins", "Losses", "Ties", "Win%", "Team STRS", "Offense SORS", "Defense SDRS", 'Diff',
-                "Off FP", "Def FP", 'NP',
-                "PF", "PA"
-        ]
-        df = pd.DataFrame(final_results, columns=columns)
+    def team_ranking_columns(self, stats: dict[str, dict[str, int]], year: int) -> dict[str, np.ndarray]:
+        """
+        Same values as `create_team_rankings`, as one typed array per column.
+        """
+        teams = list(stats)
+        record = np.array([[stats[team]['record'][key] for key in ('wins', 'losses', 'ties')] for team in teams], dtype=np.int16).reshape(-1, 3)
+        offense = np.array([[stats[team]['offense'][key] for key in ('sors', 'fantasy_points', 'pts')] for team in teams], dtype=np.float64).reshape(-1, 3)
+        defense = np.array([[stats[team]['defense'][key] for key in ('sdrs', 'fantasy_points', 'pts')] for team in teams], dtype=np.float64).reshape(-1, 3)
+        pf = offense[:, 2].astype(np.int32)
+        pa = defense[:, 2].astype(np.int32)
+
+        return {
+            "Team": np.array(teams, dtype=object),
+            "Year": np.full(len(teams), year, dtype=np.int16),
+            "Wins": record[:, 0],
+            "Losses": record[:, 1],
+            "Ties": record[:, 2],
+            "Win%": pct_batch(record[:, 0], record.sum(axis=1)),
+            "Team STRS": offense[:, 0] - defense[:, 0],
+            "Offense SORS": offense[:, 0],
+            "Defense SDRS": defense[:, 0],
+            "Diff": offense[:, 1] - defense[:, 1],
+            "Off FP": offense[:, 1],
+            "Def FP": defense[:, 1],
+            "NP": pf - pa,
+            "PF": pf,
+            "PA": pa
+        }
+
+
+
+    def team_rankings_frame(self, seasons: list[dict[str, np.ndarray]]) -> pd.DataFrame:
+        """
+        Join the `team_ranking_columns` of several seasons into one DataFrame.
+        """
+        columns = {column: np.concatenate([season[column] for season in seasons]) for column in TEAM_RANKING_COLUMNS}
+        df = pd.DataFrame(columns, columns=TEAM_RANKING_COLUMNS)
+        df["Team"] = df["Team"].astype("string")
+        return df
+
+
+
+    def display_team_rankings(self, final_results: list[list] | pd.DataFrame) -> None:
+        df = pd.DataFrame(final_results, columns=TEAM_RANKING_COLUMNS)
         
         with pd.option_context('display.max_rows', None):
             display(df)
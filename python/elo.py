@@ -1,9 +1,15 @@
+import os
 import json
+import warnings
 import random
+import numpy as np
+import multiprocessing as mp
 from tqdm import tqdm
-from stats import Stats
 from simulate import Simulate
 
+BLOCK_GAMES = 1_000_000
+CHECKPOINT_PATH = "json/elo_checkpoint_{year}.npz"
+
 
 
 def calculate_new_ratings(player1_rating, player2_rating, result, k=45):
@@ -19,6 +25,249 @@ def calculate_new_ratings(player1_rating, player2_rating, result, k=45):
 
 
 
+def elo_ratings(ratings: np.ndarray, home: np.ndarray, away: np.ndarray, results: np.ndarray, k=45, rounded: bool = True) -> np.ndarray:
+    """
+    Run `calculate_new_ratings` over a whole array of games in order.
+
+    Args:
+        ratings: Starting rating of every team
+        home: Index of the home team of every game
+        away: Index of the away team of every game
+        results: 1 for a home win, -1 for an away win, 0 for a tie
+        k: The K-factor
+        rounded: Round ratings after every game, like `calculate_new_ratings`
+
+    Returns:
+        The ratings after the last game
+    """
+    ratings = [float(rating) for rating in ratings]
+
+    for h, a, result in zip(home.tolist(), away.tolist(), results.tolist()):
+        expected = 1 / (1 + 10 ** ((ratings[a] - ratings[h]) / 400))
+        change = k * ((result + 1) / 2 - expected)
+        if rounded:
+            ratings[h], ratings[a] = round(ratings[h] + change), round(ratings[a] - change)
+        else:
+            ratings[h] += change
+            ratings[a] -= change
+
+    return np.array(ratings)
+
+
+
+def win_counts(n: int, home: np.ndarray, away: np.ndarray, results: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Aggregate games into `wins[i, j]`, the games team i won against team j,
+    and the symmetric `ties[i, j]`.
+    """
+    wins = np.zeros((n, n), dtype=np.int64)
+    ties = np.zeros((n, n), dtype=np.int64)
+    np.add.at(wins, (home[results > 0], away[results > 0]), 1)
+    np.add.at(wins, (away[results < 0], home[results < 0]), 1)
+    np.add.at(ties, (home[results == 0], away[results == 0]), 1)
+    return wins, ties + ties.T
+
+
+
+def bradley_terry(wins: np.ndarray, ties: np.ndarray = None, base: float = 1000, tol: float = 1e-10, max_iter: int = 10_000) -> np.ndarray:
+    """
+    Fit Bradley-Terry strengths to head-to-head counts with the MM algorithm,
+    a tie counting as half a win for each side, and put them on the Elo scale
+    (400 points is 10 to 1 odds) centered on `base`.
+
+    A team without a win or tie has a strength of zero and a rating of -inf,
+    and one without games a rating of NaN. A team that never lost has no
+    finite strength: it is rated +inf and left out of the fit of the others,
+    repeatedly, so a team whose only losses are to such teams is rated +inf
+    too. None of these affect the centering of the others. A warning is
+    raised if the fit has not converged after `max_iter` iterations.
+    """
+    wins = wins.astype(float)
+    if ties is not None:
+        wins = wins + 0.5 * ties
+
+    games = wins + wins.T
+    played = games.sum(axis=1) > 0
+
+    # Peel off teams unbeaten among those still being fitted
+    unbeaten = np.zeros(len(wins), dtype=bool)
+    while True:
+        rest = played & ~unbeaten
+        rest_wins = wins * rest[:, None] * rest[None, :]
+        new = rest & (rest_wins.sum(axis=0) == 0) & (rest_wins.sum(axis=1) > 0)
+        if not new.any():
+            break
+        unbeaten |= new
+
+    ratings = np.full(len(wins), np.nan)
+    ratings[unbeaten] = np.inf
+
+    rest = np.flatnonzero(played & ~unbeaten)
+    rest = rest[games[np.ix_(rest, rest)].sum(axis=1) > 0]
+    if len(rest):
+        with np.errstate(divide='ignore'):
+            ratings[rest] = base + 400 * np.log10(_bradley_terry_strength(wins[np.ix_(rest, rest)], tol, max_iter))
+
+    return ratings
+
+
+
+def _bradley_terry_strength(wins: np.ndarray, tol: float, max_iter: int) -> np.ndarray:
+    games = wins + wins.T
+    total_wins = wins.sum(axis=1)
+    strength = np.ones(len(wins))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for _ in range(max_iter):
+            updated = total_wins / np.where(games > 0, games / (strength[:, None] + strength[None, :]), 0).sum(axis=1)
+
+            positive = updated > 0
+            updated /= np.exp(np.mean(np.log(updated[positive]))) if positive.any() else 1
+            converged = np.max(np.abs(updated - strength)) < tol
+            strength = updated
+            if converged:
+                return strength
+
+    warnings.warn(f"Bradley-Terry fit did not converge in {max_iter} iterations", RuntimeWarning)
+    return strength
+
+
+
+def stream_schedule(team_count: int, opponent_amount: int, rng: np.random.Generator, block_games: int = BLOCK_GAMES, remaining: np.ndarray = None):
+    """
+    Yield a shuffled round robin of `opponent_amount` games per pair as
+    blocks of `(home, away)` team index arrays.
+
+    Each block takes a multivariate hypergeometric draw of the games still
+    left per pair and shuffles them, which gives the same distribution as
+    shuffling the whole schedule while only one block is held in memory.
+
+    `remaining`, the games left per `np.triu_indices` pair, is updated in
+    place as blocks are drawn, so passing a saved copy resumes the schedule.
+    """
+    home, away = np.triu_indices(team_count, k=1)
+    if remaining is None:
+        remaining = np.full(len(home), opponent_amount, dtype=np.int64)
+
+    while remaining.sum() > 0:
+        taken = rng.multivariate_hypergeometric(remaining, min(block_games, int(remaining.sum())))
+        remaining -= taken
+
+        pairs = rng.permutation(np.repeat(np.arange(len(home), dtype=np.int32), taken))
+        yield home[pairs].astype(np.int32), away[pairs].astype(np.int32)
+
+
+
+def save_checkpoint(path: str, state: dict, rng: np.random.Generator) -> None:
+    """
+    Atomically write a run's state and its generator's position to `path`.
+    """
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, rng=json.dumps(rng.bit_generator.state), **state)
+    os.replace(tmp_path, path)
+
+
+
+def load_checkpoint(path: str) -> tuple[dict, np.random.Generator]:
+    with np.load(path) as data:
+        state = {key: data[key] for key in data.files if key != 'rng'}
+        rng_state = json.loads(str(data['rng']))
+
+    rng = np.random.default_rng()
+    rng.bit_generator.state = rng_state
+    return state, rng
+
+
+
+def _pool_array(teams: dict, keys: list[str]) -> np.ndarray:
+    return np.array([[teams[key][field] for field in ('rating', 'wins', 'losses', 'ties')] for key in keys], dtype=np.int64)
+
+
+
+def _applied_pool(state: dict) -> np.ndarray:
+    pool = state['base'].copy()
+    pool[:, 0] = state['ratings'].astype(np.int64)
+    pool[:, 1] += state['wins'].sum(axis=1)
+    pool[:, 2] += state['wins'].sum(axis=0)
+    pool[:, 3] += state['ties'].sum(axis=1)
+    return pool
+
+
+
+def run_elo(teams: dict, opponent_amount: int, checkpoint_path: str = None, resume: bool = False, checkpoint_every: int = 1, seed: int = None, workers: int = None, block_games: int = BLOCK_GAMES, simulate: Simulate = None) -> dict:
+    """
+    Play a round robin of `opponent_amount` games per pair of `teams` and
+    return them with updated ratings, wins, losses and ties.
+
+    Every `checkpoint_every` blocks the ratings, head-to-head counts, games
+    left per pair and generator state are saved to `checkpoint_path`. With
+    `resume` a run continues from that checkpoint and finishes exactly as the
+    uninterrupted run would have. `teams` must be the same unchanged pool
+    the run started from; totals are only added to it once the run is done.
+    The checkpoint records that pool, so resuming a finished run whose totals
+    were already saved into it returns it unchanged instead of adding them
+    twice.
+
+    Each block is split into about one shard per worker, all played on one
+    pool kept for the whole run. The shard size is saved with the run, so a
+    resumed run plays the same shards whatever its worker count.
+    """
+    owns_simulate = simulate is None
+    simulate = simulate if simulate is not None else Simulate()
+    keys = list(teams.keys())
+    team_ids = [(key[:3], int(key[4:])) for key in keys]
+
+    if resume and checkpoint_path is not None and os.path.exists(checkpoint_path):
+        state, rng = load_checkpoint(checkpoint_path)
+        if state['keys'].tolist() != keys or int(state['opponent_amount']) != opponent_amount:
+            raise ValueError(f"Checkpoint {checkpoint_path} is for a different pool or schedule")
+
+        pool = _pool_array(teams, keys)
+        if not np.array_equal(pool, state['base']):
+            if state['remaining'].sum() == 0 and np.array_equal(pool, _applied_pool(state)):
+                return teams
+
+            raise ValueError(f"The pool has changed since checkpoint {checkpoint_path} was started")
+    else:
+        rng = np.random.default_rng(seed)
+        state = {
+            'keys': np.array(keys),
+            'base': _pool_array(teams, keys),
+            'opponent_amount': np.array(opponent_amount),
+            'ratings': np.array([teams[key]['rating'] for key in keys], dtype=float),
+            'wins': np.zeros((len(keys), len(keys)), dtype=np.int64),
+            'ties': np.zeros((len(keys), len(keys)), dtype=np.int64),
+            'remaining': np.full(len(keys) * (len(keys) - 1) // 2, opponent_amount, dtype=np.int64),
+            'shard_games': np.array(-(-block_games // max(workers or 1, 1))),
+            'blocks': np.array(0)
+        }
+
+    remaining = state['remaining']
+    shard_games = int(state['shard_games'])
+    blocks = -(-int(remaining.sum()) // block_games)
+
+    try:
+        for home, away in tqdm(stream_schedule(len(keys), opponent_amount, rng, block_games, remaining), total=blocks, desc="Blocks"):
+            results = simulate.simulate_indexed(team_ids, home, away, int(rng.integers(2 ** 63)), workers, shard_games)
+            state['ratings'] = elo_ratings(state['ratings'], home, away, results)
+            block_wins, block_ties = win_counts(len(keys), home, away, results)
+            state['wins'] += block_wins
+            state['ties'] += block_ties
+            state['blocks'] = np.array(int(state['blocks']) + 1)
+
+            if checkpoint_path is not None and (int(state['blocks']) % checkpoint_every == 0 or remaining.sum() == 0):
+                save_checkpoint(checkpoint_path, state, rng)
+    finally:
+        if owns_simulate:
+            simulate.close()
+
+    for key, (rating, wins, losses, ties) in zip(keys, _applied_pool(state).tolist()):
+        teams[key].update(rating=rating, wins=wins, losses=losses, ties=ties)
+
+    return teams
+
+
+
 def create_sch(teams: dict, opponent_amount: int):
     schedule = []
     teams_list = [(team[:3], int(team[4:])) for team in teams.keys()]
@@ -39,45 +288,9 @@ if __name__ == '__main__':
     with open(f"json/ratings_{year}.json", "r") as j:
         teams = json.load(j)
     
-    simulate = Simulate()
-    stats = {}
-
-    schedule = create_sch(teams, 10000)
-
-    for game in tqdm(schedule):
-        home_team = game[0]
-        home_year = game[1]
-        away_team = game[3]
-        away_year = game[4]
-
-        home_key = f"{home_team}-{home_year}"
-        away_key = f"{away_team}-{away_year}"
-
-        if home_year == away_year:
-            if home_year not in stats:
-                stats[home_year] = Stats(home_year)
-        else:
-            if home_year not in stats:
-                stats[home_year] = Stats(home_year)
-            if away_year not in stats:
-                stats[away_year] = Stats(away_year)
-
-        result = simulate.simulate_game(home_team, stats[home_year], away_team, stats[away_year])
-
-        if result == 1:
-            result = 1
-            teams[home_key]['wins'] += 1
-            teams[away_key]['losses'] += 1
-        elif result == -1:
-            result = 0
-            teams[away_key]['wins'] += 1
-            teams[home_key]['losses'] += 1
-        else:
-            result = 0.5
-            teams[away_key]['ties'] += 1
-            teams[home_key]['ties'] += 1
-
-        teams[home_key]["rating"], teams[away_key]["rating"] = calculate_new_ratings(teams[home_key]["rating"], teams[away_key]["rating"], result)
+    # Rerunning after an interruption picks the run up from its last checkpoint
+    checkpoint_path = CHECKPOINT_PATH.format(year=year)
+    teams = run_elo(teams, 10000, checkpoint_path, resume=True, workers=mp.cpu_count())
 
     sorted_teams = sorted(teams.items(), key=lambda x: x[1]['rating'], reverse=True)
 
@@ -87,8 +300,14 @@ if __name__ == '__main__':
         print(f"{rank}. {team} (Rating: {data['rating']}), wins: {teams[team]['wins']}, losses: {teams[team]['losses']}, ties: {teams[team]['ties']}")
 
 
-    with open(f"json/ratings_{year}.json", "w") as j:
+    # Written atomically; if the checkpoint outlives it, resuming sees the
+    # totals are already in the pool and does not add them again
+    with open(f"json/ratings_{year}.json.tmp", "w") as j:
         json.dump(teams, j, indent=2)
+    os.replace(f"json/ratings_{year}.json.tmp", f"json/ratings_{year}.json")
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
 
     with open(f"json/ratings_{year}.json", "r") as j:
         teams = json.load(j)
@@ -0,0 +1,112 @@
+import os
+import json
+import fcntl
+import tempfile
+
+CACHE_PATH = "cache/matchups.json"
+
+
+
+class MatchupCache:
+    """
+    On-disk store of simulated matchup counts (home wins, away wins, ties).
+
+    Entries are keyed by both team-seasons, the number of games, the seed and
+    a version of the data and simulation code, so a stale entry is never
+    returned; it simply stops being looked up.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self.entries = self._load()
+        self.hits = 0
+        self.misses = 0
+
+
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+
+        try:
+            with open(self.path, "r") as j:
+                return json.load(j)
+        except (OSError, ValueError):
+            return {}
+
+
+
+    def save(self, merge: bool = True) -> None:
+        """
+        Write the entries out, first taking in any entries another process has
+        saved since they were loaded so concurrent runs do not drop each
+        other's. A lock file keeps the merge and write of one process from
+        interleaving with another's.
+        """
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            lock = open(f"{self.path}.lock", "w")
+        except OSError:
+            return
+
+        with lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if merge:
+                self.entries = {**self._load(), **self.entries}
+
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            except OSError:
+                return
+
+            try:
+                with os.fdopen(fd, "w") as j:
+                    json.dump(self.entries, j, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+
+
+    @staticmethod
+    def key(home_id: str, away_id: str, game_played: int, seed: int, version: str) -> str:
+        return f"{home_id}|{away_id}|{game_played}|{seed}|{version}"
+
+
+
+    def get(self, key: str) -> tuple[int, int, int]:
+        counts = self.entries.get(key)
+        if counts is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return tuple(counts)
+
+
+
+    def put(self, key: str, counts: tuple[int, int, int], save: bool = True) -> None:
+        """
+        Pass `save=False` to batch several entries into one `save()`.
+        """
+        self.entries[key] = list(counts)
+        if save:
+            self.save()
+
+
+
+    def clear(self) -> None:
+        self.entries = {}
+        self.save(merge=False)
+
+
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -1,15 +1,29 @@
+import os
 import csv
+import json
 import pickle
+import glob
+import hashlib
+import inspect
+import numpy as np
+import multiprocessing as mp
+
+from season_store import SeasonStore
+from season_archive import ARCHIVE_PATH, write_archive
+from stats import Stats
 
 start_year = 1980
 end_year = 2024
 
-PASSING = { 'cmp': 16, 'p_att': 17, 'p_yds': 20, 'p_td': 21, 'int': 22, 'p_1d': 54 }
-RUSHING = { 'r_att': 34, 'r_yds': 35, 'r_td': 37, 'fum': ( 43, 22 ), 'r_1d': 53 }
-PRESSURE = { 'sk': 26, 's_yds': 27 }
-CONVERSIONS = { '3da': 56, '3dc': 57, '4da': 59, '4dc': 60 }
-PENALTIES = { 'pen': 46, 'yds': 47, 'pen_1d': 55 }
-SCORING = { 't_td': 62, 'xpa': 63, 'xpm': 64, 'fga': 65, 'fgm': 66, '2pa': 67, '2pm': 68, 'sfty': 69, 'krtd': 70, 'prtd': 71, 'inttd': 72, 'frtd': 73, 'otd': 74 }
+# Columns are referenced by header name. Repeated headers (the several `Att`,
+# `Yds`, `TD`, ... columns) take a `#n` occurrence suffix, counted from the
+# end when negative. A tuple is the first column minus the second.
+PASSING = { 'cmp': 'Cmp', 'p_att': 'Att#2', 'p_yds': 'Yds#0', 'p_td': 'TD#1', 'int': 'Int', 'p_1d': 'Pass' }
+RUSHING = { 'r_att': 'Att#3', 'r_yds': 'Yds#2', 'r_td': 'TD#2', 'fum': ( 'TO#-1', 'Int' ), 'r_1d': 'Rsh' }
+PRESSURE = { 'sk': 'Sk', 's_yds': 'Yds#1' }
+CONVERSIONS = { '3da': '3DAtt', '3dc': '3DConv', '4da': '4DAtt', '4dc': '4DConv' }
+PENALTIES = { 'pen': 'Pen#1', 'yds': 'Yds#3', 'pen_1d': 'Pen#2' }
+SCORING = { 't_td': 'TD#3', 'xpa': 'XPA', 'xpm': 'XPM', 'fga': 'FGA', 'fgm': 'FGM', '2pa': '2PA', '2pm': '2PM', 'sfty': 'Sfty', 'krtd': 'KRTD#1', 'prtd': 'PRTD', 'inttd': 'IntTD', 'frtd': 'FRTD', 'otd': 'OthTD' }
 
 KEYS = {
     'passing': PASSING,
@@ -21,39 +35,200 @@ KEYS = {
 }
 
 
-for year in range(start_year, end_year + 1):
-    path = f"csv/{year} NFL Team Stats.csv"
+MANIFEST_PATH = "archive/manifest.json"
+
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+
+def _schema_hash() -> str:
+    """
+    Hash of the column mapping and of the code that parses a CSV into a
+    season, so changing either rebuilds every season.
+    """
+    digest = hashlib.sha256(json.dumps(KEYS, sort_keys=True).encode())
+    for function in (read_season_csv, resolve_column, _to_int, parse_season, SeasonStore.from_columns):
+        digest.update(inspect.getsource(function).encode())
+
+    return digest.hexdigest()
+
+
+
+def _season_paths(year: int) -> dict[str, str]:
+    return {
+        'csv': f"csv/{year} NFL Team Stats.csv",
+        'pickle': f"pickle/{year} NFL Team Stats.pkl",
+        'npz': f"npz/{year} NFL Team Stats.npz"
+    }
+
+
+
+def resolve_column(header: list[str], column: str) -> int:
+    name, _, occurrence = column.partition('#')
+    positions = [i for i, heading in enumerate(header) if heading == name]
+
+    if not positions:
+        raise KeyError(f"Column {name} not found in header")
+    
+    try:
+        return positions[int(occurrence) if occurrence else 0]
+    except IndexError:
+        raise KeyError(f"Column {column} not found in header, {name} only appears {len(positions)} time(s)") from None
+
+
+
+def read_season_csv(path: str) -> tuple[list[str], np.ndarray]:
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.reader(f))
+    
+    header = rows[0]
+    table = np.array([row for row in rows[1:] if len(row) == len(header)], dtype=str)
+
+    team = table[:, resolve_column(header, 'Team')]
+    return header, table[(team != 'Team') & (team != '')]
+
+
+
+def _to_int(columns: np.ndarray) -> np.ndarray:
+    return np.where(columns == '', '0', columns).astype(np.int32)
+
+
+
+def parse_season(year: int) -> SeasonStore:
+    header, table = read_season_csv(_season_paths(year)['csv'])
+
+    stat_names = []
+    stat_categories = []
+    plus = []
+    minus = {}
+
+    for category, columns in KEYS.items():
+        for stat, column in columns.items():
+            if isinstance(column, tuple):
+                column, minus[len(stat_names)] = column[0], resolve_column(header, column[1])
+
+            stat_names.append(stat)
+            stat_categories.append(category)
+            plus.append(resolve_column(header, column))
+
+    values = _to_int(table[:, plus])
+    if minus:
+        values[:, list(minus)] -= _to_int(table[:, list(minus.values())])
 
-    year_stats = {}
+    return SeasonStore.from_columns(
+        table[:, resolve_column(header, 'Team')],
+        _to_int(table[:, resolve_column(header, 'Week')]),
+        table[:, resolve_column(header, 'Opp')],
+        stat_names,
+        stat_categories,
+        values
+    )
+
+
+
+def build_season(year: int) -> tuple[int, str]:
+    paths = _season_paths(year)
+    csv_hash = _file_hash(paths['csv'])
+    season = parse_season(year)
+
+    with open(paths['pickle'], "wb") as pkl:
+        pickle.dump(season.to_year_stats(), pkl)
+
+    season.save(paths['npz'])
+    return year, csv_hash
+
+
+
+def _load_manifest() -> dict:
+    if not os.path.exists(MANIFEST_PATH):
+        return {'schema': None, 'seasons': {}}
+
+    with open(MANIFEST_PATH, "r") as j:
+        return json.load(j)
+
+
+
+def _save_manifest(manifest: dict) -> None:
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    with open(MANIFEST_PATH, "w") as j:
+        json.dump(manifest, j, indent=2, sort_keys=True)
+
+
+
+def stale_seasons(years: list[int], manifest: dict) -> list[int]:
+    if manifest['schema'] != _schema_hash():
+        return list(years)
+
+    stale = []
+    for year in years:
+        paths = _season_paths(year)
+        outputs_exist = os.path.exists(paths['pickle']) and os.path.exists(paths['npz'])
+
+        if not outputs_exist or manifest['seasons'].get(str(year)) != _file_hash(paths['csv']):
+            stale.append(year)
+    
+    return stale
+
+
+
+def _built_years() -> list[int]:
+    pattern = _season_paths('*')['npz']
+    prefix, suffix = pattern.split('*')
+    return sorted(int(path[len(prefix):-len(suffix)]) for path in glob.glob(pattern) if path[len(prefix):-len(suffix)].isdigit())
+
+
+
+def build(start_year: int, end_year: int, workers: int = None, force: bool = False) -> list[int]:
+    """
+    Rebuild the pickle, npz, derived metric and archive outputs for every
+    season whose CSV (or the column schema) changed since the last build.
+
+    Args:
+        start_year: First season to build
+        end_year: Last season to build (inclusive)
+        workers: Number of worker processes (default: one per CPU)
+        force: Rebuild every season regardless of the manifest
+        
+    Returns:
+        The seasons that were rebuilt
+    """
+    years = list(range(start_year, end_year + 1))
+    manifest = _load_manifest()
+    stale = list(years) if force else stale_seasons(years, manifest)
+
+    if manifest['schema'] != _schema_hash():
+        manifest = {'schema': _schema_hash(), 'seasons': {}}
+
+    if stale:
+        with mp.Pool(min(workers or mp.cpu_count(), len(stale))) as pool:
+            for year, csv_hash in pool.imap_unordered(build_season, stale):
+                manifest['seasons'][str(year)] = csv_hash
     
-    with open(path, 'r') as f:
-        reader = csv.reader(f)
-
-        for row in reader:
-            
-            if row[1] == "Team" or row[1] == '':
-                continue
-            
-            team = row[1]
-            if team not in year_stats:
-                year_stats[team] = {}
-            
-            week = row[12]
-            opponent = row[14]
-            if week not in year_stats[team]:
-                year_stats[team][week] = {}
-                year_stats[team][week]['opp'] = opponent
-
-            for key in KEYS:
-                year_stats[team][week][key] = {}
-
-                for stat, value in KEYS[key].items():
-
-                    if isinstance(value, tuple):
-                        year_stats[team][week][key][stat] = int(row[value[0]]) - int(row[value[1]])
-                    else:
-                        year_stats[team][week][key][stat] = int(row[value]) if row[value] != '' else 0
-
-
-    with open(f"pickle/{year} NFL Team Stats.pkl", "wb") as pkl:
-        pickle.dump(year_stats, pkl)
\ No newline at end of file
+    # The archive holds every built season, not only the ones asked for
+    seasons = {year: SeasonStore.load(_season_paths(year)['npz']) for year in sorted(set(years) | set(_built_years()))}
+    if stale or not os.path.exists(ARCHIVE_PATH):
+        write_archive(seasons)
+
+    # Precompute per-week derived metrics and sampling tables; unchanged seasons are only
+    # recomputed when the scoring code changed since they were persisted
+    for year in years:
+        stats = Stats(year, seasons[year])
+        stats.derived_stats(refresh=year in stale)
+        stats.sampling_tables(refresh=year in stale)
+
+    _save_manifest(manifest)
+    return sorted(stale)
+
+
+
+if __name__ == "__main__":
+    rebuilt = build(start_year, end_year)
+    print(f"Rebuilt {len(rebuilt)} season(s): {rebuilt}")
@@ -0,0 +1,146 @@
+import random
+import numpy as np
+
+
+
+def bin_edges(ratings: np.ndarray) -> np.ndarray:
+    # Calculate bin width using Freedman-Diaconis rule
+    bin_width = 2 * (np.percentile(ratings, 75) - np.percentile(ratings, 25)) * (len(ratings) ** (-1/3))
+
+    data_min = ratings.min()
+    data_max = ratings.max()
+
+    # Every rating is the same (or there is only one), use a single bin
+    if bin_width <= 0:
+        return np.array([data_min, data_max])
+
+    # Create bin edges from min to max using the calculated width
+    return np.arange(data_min, data_max + bin_width, bin_width)
+
+
+
+class SamplingTable:
+    """
+    Immutable sampler over one team-season side of the ball.
+
+    Games are stored grouped by their rating bin, so slot `k` of `n` covers the
+    CDF interval [k / n, (k + 1) / n). A draw picks a quantile, reads the bin
+    owning that slot, then a game uniformly within the bin, in constant time.
+    The quantile itself is returned as the game's blending weight.
+    """
+
+    def __init__(self, weeks: np.ndarray, rows: np.ndarray, slot_bin: np.ndarray, bin_start: np.ndarray, bin_count: np.ndarray):
+        self.weeks = weeks
+        self.rows = rows
+        self.slot_bin = slot_bin
+        self.bin_start = bin_start
+        self.bin_count = bin_count
+        self.size = len(weeks)
+
+        for array in (weeks, rows, slot_bin, bin_start, bin_count):
+            array.flags.writeable = False
+
+        # Plain tuples for single draws, where numpy scalar indexing dominates
+        self._rows = tuple(rows.tolist())
+        self._slot_bin = tuple(slot_bin.tolist())
+        self._bin_start = tuple(bin_start.tolist())
+        self._bin_count = tuple(bin_count.tolist())
+
+
+
+    @classmethod
+    def from_ratings(cls, ratings: np.ndarray, weeks: np.ndarray, rows: np.ndarray) -> "SamplingTable":
+        """
+        Bin a team's per-week ratings with the Freedman-Diaconis rule.
+
+        Args:
+            ratings: The rating (sors or sdrs) of every game
+            weeks: Week number of every game
+            rows: Index of every game's stat row in the season's team-week matrix
+        """
+        ratings = np.asarray(ratings, dtype=np.float64)
+        edges = bin_edges(ratings)
+
+        # Same bins as np.histogram: half open, except the last which is closed
+        bins = np.clip(np.searchsorted(edges, ratings, side='right') - 1, 0, len(edges) - 2)
+        order = np.argsort(bins, kind='stable')
+        bin_count = np.bincount(bins, minlength=len(edges) - 1)
+        bin_start = np.concatenate(([0], np.cumsum(bin_count)[:-1]))
+
+        return cls(np.asarray(weeks)[order], np.asarray(rows)[order], bins[order], bin_start, bin_count)
+
+
+
+    def _games(self, position: np.ndarray, choice: np.ndarray) -> np.ndarray:
+        slots = np.minimum((position * self.size).astype(np.intp), self.size - 1)
+        bins = self.slot_bin[slots]
+        return self.bin_start[bins] + (choice * self.bin_count[bins]).astype(np.intp)
+
+
+
+    def draw(self, n: int, side: bool, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Draw `n` games. Offense (`side` True) maps the draw straight to a
+        quantile, defense uses one minus it, so a high weight picks a strong
+        offense or a stingy defense.
+
+        Returns:
+            Positions of the games in this table and their weights
+        """
+        draws = rng.random(n)
+        position = draws if side else 1 - draws
+        return self._games(position, rng.random(n)), draws
+
+
+
+    def draw_row(self, side: bool) -> tuple[int, float]:
+        """
+        `draw_one`, returning the game's stat row instead of its position.
+        """
+        game, draw = self.draw_one(side)
+        return self._rows[game], draw
+
+
+
+    def draw_one(self, side: bool) -> tuple[int, float]:
+        """
+        Draw a single game with the `random` module.
+
+        Returns:
+            Position of the game in this table and its weight
+        """
+        draw = random.random()
+        position = draw if side else 1 - draw
+        slot = min(int(position * self.size), self.size - 1)
+        b = self._slot_bin[slot]
+        return self._bin_start[b] + int(random.random() * self._bin_count[b]), draw
+
+
+
+    @staticmethod
+    def pack(tables: list["SamplingTable"]) -> dict[str, np.ndarray]:
+        """
+        Concatenate many tables into flat arrays, for saving with `np.savez`.
+        """
+        return {
+            'sizes': np.array([table.size for table in tables], dtype=np.int64),
+            'bins': np.array([len(table.bin_count) for table in tables], dtype=np.int64),
+            'weeks': np.concatenate([table.weeks for table in tables]),
+            'rows': np.concatenate([table.rows for table in tables]),
+            'slot_bin': np.concatenate([table.slot_bin for table in tables]),
+            'bin_start': np.concatenate([table.bin_start for table in tables]),
+            'bin_count': np.concatenate([table.bin_count for table in tables])
+        }
+
+
+
+    @classmethod
+    def unpack(cls, arrays: dict[str, np.ndarray]) -> list["SamplingTable"]:
+        """
+        Split arrays made by `pack` back into tables.
+        """
+        game_splits = np.cumsum(arrays['sizes'])[:-1]
+        bin_splits = np.cumsum(arrays['bins'])[:-1]
+        games = zip(*(np.split(np.array(arrays[key]), game_splits) for key in ('weeks', 'rows', 'slot_bin')))
+        bins = zip(*(np.split(np.array(arrays[key]), bin_splits) for key in ('bin_start', 'bin_count')))
+        return [cls(weeks, rows, slot_bin, bin_start, bin_count) for (weeks, rows, slot_bin), (bin_start, bin_count) in zip(games, bins)]
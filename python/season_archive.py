@@ -0,0 +1,135 @@
+import os
+import json
+import struct
+import numpy as np
+
+from season_store import SeasonStore
+
+ARCHIVE_PATH = "archive/NFL Team Stats.bin"
+MAGIC = b"FJSA"
+VERSION = 1
+ALIGN = 64
+
+_open_archives = {}
+
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+
+def write_archive(seasons: dict[int, SeasonStore], path: str = ARCHIVE_PATH) -> None:
+    """
+    Write every season into one file laid out for memory mapping.
+
+    The file is a small JSON header followed by the raw, 64-byte aligned
+    `weeks`, `opponents` and `stats` arrays of each season.
+    """
+    header = {'version': VERSION, 'seasons': {}}
+    blocks = []
+    offset = 0
+
+    for year in sorted(seasons):
+        season = seasons[year]
+        arrays = {}
+
+        for name in ('weeks', 'opponents', 'stats'):
+            array = np.ascontiguousarray(getattr(season, name))
+            offset = _aligned(offset)
+            arrays[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+            blocks.append((offset, array))
+            offset += array.nbytes
+
+        header['seasons'][str(year)] = {
+            'teams': season.teams,
+            'stat_names': season.stat_names,
+            'stat_categories': season.stat_categories,
+            'arrays': arrays
+        }
+
+    raw_header = json.dumps(header).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(raw_header))
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(raw_header)))
+        f.write(raw_header)
+
+        for block_offset, array in blocks:
+            f.seek(data_start + block_offset)
+            f.write(array.tobytes())
+
+    os.replace(tmp_path, path)
+
+
+
+class SeasonArchive:
+    """
+    Read-only, memory-mapped view over an archive written by `write_archive`.
+
+    Opening only parses the header; a season's arrays are zero-copy views into
+    the mapping, so pages are read on first touch and shared between processes
+    through the OS page cache.
+    """
+
+    def __init__(self, path: str = ARCHIVE_PATH):
+        self.path = path
+
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a season archive")
+
+            header_size = struct.unpack("<Q", f.read(8))[0]
+            self.header = json.loads(f.read(header_size))
+
+        if self.header['version'] != VERSION:
+            raise ValueError(f"Unsupported season archive version {self.header['version']} in {path}")
+
+        self.data_start = _aligned(len(MAGIC) + 8 + header_size)
+        self.buffer = np.memmap(path, dtype=np.uint8, mode='r').view(np.ndarray)
+        self.seasons = {}
+
+
+
+    def years(self) -> list[int]:
+        return sorted(int(year) for year in self.header['seasons'])
+
+
+
+    def __contains__(self, year: int) -> bool:
+        return str(year) in self.header['seasons']
+
+
+
+    def _array(self, spec: dict) -> np.ndarray:
+        dtype = np.dtype(spec['dtype'])
+        start = self.data_start + spec['offset']
+        count = int(np.prod(spec['shape']))
+        return self.buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+
+
+    def season(self, year: int) -> SeasonStore:
+        if year not in self.seasons:
+            if year not in self:
+                raise KeyError(f"Season {year} is not in {self.path}")
+
+            info = self.header['seasons'][str(year)]
+            arrays = {name: self._array(spec) for name, spec in info['arrays'].items()}
+            self.seasons[year] = SeasonStore(info['teams'], arrays['weeks'], arrays['opponents'], info['stat_names'], info['stat_categories'], arrays['stats'])
+
+        return self.seasons[year]
+
+
+
+def open_archive(path: str = ARCHIVE_PATH) -> SeasonArchive:
+    """
+    Return the process-wide archive for `path`, or None if it has not been built.
+    """
+    if path not in _open_archives:
+        _open_archives[path] = SeasonArchive(path) if os.path.exists(path) else None
+
+    return _open_archives[path]
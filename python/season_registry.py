@@ -0,0 +1,100 @@
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_default_registry = None
+
+
+
+class SeasonRegistry:
+    """
+    Least-recently-used cache of `Stats` objects bounded by a memory budget.
+
+    A season is evicted once the seasons held exceed `max_bytes`, except for
+    the one just requested, which is always kept.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, loader = None):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.seasons = OrderedDict()
+        self.loads = 0
+        self.evictions = 0
+
+
+
+    def _load(self, year: int):
+        if self.loader is None:
+            from stats import Stats
+            self.loader = Stats
+
+        self.loads += 1
+        return self.loader(year)
+
+
+
+    def get(self, year: int):
+        if year in self.seasons:
+            self.seasons.move_to_end(year)
+        else:
+            self.seasons[year] = self._load(year)
+            self._evict()
+
+        return self.seasons[year]
+
+
+
+    def nbytes(self) -> int:
+        return sum(stats.nbytes() for stats in self.seasons.values())
+
+
+
+    def _evict(self) -> None:
+        while len(self.seasons) > 1 and self.nbytes() > self.max_bytes:
+            self.seasons.popitem(last=False)
+            self.evictions += 1
+
+
+
+    def resize(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._evict()
+
+
+
+    def clear(self) -> None:
+        self.seasons.clear()
+
+
+
+    def __contains__(self, year: int) -> bool:
+        return year in self.seasons
+
+
+
+    def __len__(self) -> int:
+        return len(self.seasons)
+
+
+
+def default_registry() -> SeasonRegistry:
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = SeasonRegistry()
+
+    return _default_registry
+
+
+
+def get_season(year: int):
+    return default_registry().get(year)
+
+
+
+def configure(max_bytes: int) -> SeasonRegistry:
+    """
+    Set the memory budget of the process-wide registry.
+    """
+    registry = default_registry()
+    registry.resize(max_bytes)
+    return registry
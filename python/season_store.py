@@ -0,0 +1,165 @@
+import json
+import hashlib
+import numpy as np
+
+
+
+class SeasonStore:
+    """
+    Columnar view of one season: a dense team x week x stat array plus the
+    index tables needed to address it.
+
+    Weeks a team did not play are left as zero rows and have an opponent of -1.
+    """
+
+    def __init__(self, teams: list[str], weeks: np.ndarray, opponents: np.ndarray, stat_names: list[str], stat_categories: list[str], stats: np.ndarray):
+        self.teams = list(teams)
+        self.weeks = np.asarray(weeks)
+        self.opponents = np.asarray(opponents)
+        self.stat_names = list(stat_names)
+        self.stat_categories = list(stat_categories)
+        self.stats = stats
+
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.week_index = {int(week): i for i, week in enumerate(self.weeks)}
+        self.stat_index = {stat: i for i, stat in enumerate(self.stat_names)}
+        self.played = self.opponents >= 0
+
+        self.categories = {}
+        for i, category in enumerate(self.stat_categories):
+            self.categories.setdefault(category, []).append(i)
+        self.categories = {category: np.array(idx) for category, idx in self.categories.items()}
+
+
+
+    @classmethod
+    def from_year_stats(cls, year_stats: dict) -> "SeasonStore":
+        teams = list(year_stats.keys())
+        team_index = {team: i for i, team in enumerate(teams)}
+        weeks = sorted({int(week) for team in year_stats for week in year_stats[team]})
+        week_index = {week: i for i, week in enumerate(weeks)}
+
+        stat_names = []
+        stat_categories = []
+        sample = next(iter(year_stats[teams[0]].values()))
+        for category, category_stats in sample.items():
+            if category == 'opp':
+                continue
+
+            for stat in category_stats:
+                stat_names.append(stat)
+                stat_categories.append(category)
+
+        opponents = np.full((len(teams), len(weeks)), -1, dtype=np.int16)
+        stats = np.zeros((len(teams), len(weeks), len(stat_names)), dtype=np.int32)
+
+        for team, team_weeks in year_stats.items():
+            t = team_index[team]
+            for week, week_stats in team_weeks.items():
+                w = week_index[int(week)]
+                opponents[t, w] = team_index[week_stats['opp']]
+                stats[t, w] = [week_stats[category][stat] for category, stat in zip(stat_categories, stat_names)]
+
+        return cls(teams, np.array(weeks, dtype=np.int16), opponents, stat_names, stat_categories, stats)
+
+
+
+    @classmethod
+    def from_columns(cls, teams: np.ndarray, weeks: np.ndarray, opponents: np.ndarray, stat_names: list[str], stat_categories: list[str], values: np.ndarray) -> "SeasonStore":
+        """
+        Build a season from one entry per game row. Teams keep their order of
+        first appearance; if a team has two rows in the same week the first
+        row's opponent and the last row's stats are kept.
+        """
+        names, first, inverse = np.unique(teams, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+
+        team_idx = rank[inverse]
+        opp_idx = rank[np.searchsorted(names, opponents)]
+        week_numbers, week_idx = np.unique(weeks, return_inverse=True)
+
+        shape = (len(names), len(week_numbers))
+        slot = np.ravel_multi_index((team_idx, week_idx), shape)
+        _, first_row = np.unique(slot, return_index=True)
+        _, last_row = np.unique(slot[::-1], return_index=True)
+        last_row = len(slot) - 1 - last_row
+
+        opp_table = np.full(shape, -1, dtype=np.int16)
+        opp_table.flat[slot[first_row]] = opp_idx[first_row]
+        stats = np.zeros(shape + (len(stat_names),), dtype=np.int32)
+        stats.reshape(-1, len(stat_names))[slot[last_row]] = values[last_row]
+
+        return cls(names[order].tolist(), week_numbers.astype(np.int16), opp_table, stat_names, stat_categories, stats)
+
+
+
+    def to_year_stats(self) -> dict:
+        """
+        Rebuild the legacy `year_stats[team][week][category][stat]` dict.
+        """
+        year_stats = {}
+        stats = self.stats.tolist()
+
+        for t, team in enumerate(self.teams):
+            year_stats[team] = {}
+            for w, week in enumerate(self.weeks.tolist()):
+                if not self.played[t, w]:
+                    continue
+
+                week_stats = {'opp': self.teams[self.opponents[t, w]]}
+                for category, stat, value in zip(self.stat_categories, self.stat_names, stats[t][w]):
+                    if category not in week_stats:
+                        week_stats[category] = {}
+                    week_stats[category][stat] = value
+
+                year_stats[team][str(week)] = week_stats
+
+        return year_stats
+
+
+
+    def fingerprint(self) -> str:
+        """
+        Hash of the season's contents, to tell when results computed from it
+        are out of date.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([self.teams, self.stat_names, self.stat_categories]).encode())
+        for array in (self.weeks, self.opponents, self.stats):
+            digest.update(np.ascontiguousarray(array).tobytes())
+
+        return digest.hexdigest()
+
+
+
+    def stat_columns(self, stat_type) -> np.ndarray:
+        return np.concatenate([self.categories[category] for category in stat_type if category in self.categories])
+
+
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            teams=np.array(self.teams),
+            weeks=self.weeks,
+            opponents=self.opponents,
+            stat_names=np.array(self.stat_names),
+            stat_categories=np.array(self.stat_categories),
+            stats=self.stats
+        )
+
+
+
+    @classmethod
+    def load(cls, path: str) -> "SeasonStore":
+        with np.load(path) as data:
+            return cls(
+                data['teams'].tolist(),
+                data['weeks'],
+                data['opponents'],
+                data['stat_names'].tolist(),
+                data['stat_categories'].tolist(),
+                data['stats']
+            )
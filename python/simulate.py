@@ -1,149 +1,146 @@
-import random
+import hashlib
+import inspect
 import numpy as np 
 import multiprocessing as mp
 from functools import partial
+from statistics import NormalDist
 from tqdm import tqdm
 
 from stats import Stats
-from special import score
+from special import score, score_weights
+from season_registry import SeasonRegistry, default_registry
+from sampling_table import SamplingTable
+from matchup_cache import MatchupCache
+
+SHARD_GAMES = 2_500
+ADAPTIVE_BATCH = 200
+# Schedules are played pair by pair within a shard, so their shards are larger
+SCHEDULE_SHARD_GAMES = 250_000
+
 
 
 class Simulate():
 
 
-    def __init__(self):
+    def __init__(self, registry: SeasonRegistry = None, cache: MatchupCache = None):
         self.teams = {}
+        self.seasons = registry if registry is not None else default_registry()
+        self.cache = cache
+        self.fingerprints = {}
+        self.points = {}
+        self.pool = None
+        self.pool_workers = None
 
 
 
-    def _in_teams(self, team: str, games: Stats, side: bool):
-        if team not in self.teams:
-            self.teams[team] = {'offense': {}, 'defense': {}}
+    def _season(self, games: Stats | int) -> Stats:
+        return games if isinstance(games, Stats) else self.seasons.get(games)
 
-        key = 'offense' if side else 'defense'
-        small_key = 'off' if side else 'def'
 
-        if len(self.teams[team][key]) == 0:
-            stats, pct, keys = self.create_histogram(games, key, team)
-            self.teams[team][key] = {f"{small_key}_stats": stats, f"{small_key}_pct": pct, f"{small_key}_keys": keys}
 
+    def _in_teams(self, team: str, games: Stats, side: bool) -> SamplingTable:
+        team_id = f"{team}-{games.year}"
+        if team_id not in self.teams:
+            self.warm(games)
 
+        return self.teams[team_id]['offense' if side else 'defense']
 
-    def search(self, ranks: list[float], position: float):
-        if position < ranks[0]:
-            return ranks[0]
-        
-        l, r = 0, len(ranks) - 1
 
-        while l <= r:
-            m = (l + r) // 2
 
-            if ranks[m - 1] <= position <= ranks[m]:
-                return ranks[m]
-            elif ranks[m] > position:
-                r = m - 1
-            elif ranks[m] < position:
-                l = m + 1
+    def warm(self, *seasons: Stats | int) -> None:
+        """
+        Load every team's sampling tables for the given seasons at once.
+        """
+        for games in seasons:
+            games = self._season(games)
+            for team, tables in games.sampling_tables().items():
+                self.teams[f"{team}-{games.year}"] = tables
 
 
 
-    def find(self, pcts: list[float], value: float):
-        for index, pct in enumerate(pcts):
-            if value < pct:
-                return index
+    def create_histogram(self, league_stats: Stats, side_of_the_ball: str, team: str) -> SamplingTable:
+        score = 'sors' if side_of_the_ball == 'offense' else 'sdrs'
+        stats_per_week = league_stats.grab_stats_per_week(team, side_of_the_ball, apply_extra=True)
+        team_weeks = stats_per_week[team[:3]]
 
+        season = league_stats.season
+        t = season.team_index[team[:3]]
+        weeks = np.array([int(week) for week in team_weeks])
+        rows = np.array([t * len(season.weeks) + season.week_index[week] for week in weeks.tolist()])
+        ratings = [week_stats[side_of_the_ball][score] for week_stats in team_weeks.values()]
 
+        return SamplingTable.from_ratings(ratings, weeks, rows)
 
-    def histogram_math(self, ranks: list[float]):
-        # Calculate bin width using Freedman-Diaconis rule
-        bin_width = 2 * (np.percentile(ranks, 75) - np.percentile(ranks, 25)) * (len(ranks) ** (-1/3))
-        
-        # Calculate bin edges
-        data_min = min(ranks)
-        data_max = max(ranks)
-        
-        # Create bin edges from min to max using the calculated width
-        bin_edges = np.arange(data_min, data_max + bin_width, bin_width)
-        
-        # Count items in each bin
-        counts, _ = np.histogram(ranks, bins=bin_edges)
-        
-        # Create a dictionary mapping each bin range to its count
-        bin_counts = {}
-        total_count = 0
-        for i in range(len(counts)):
-            bin_range = bin_edges[i + 1]
-            total_count += counts[i]
-            bin_counts[bin_range] = total_count / len(ranks)
-        
-        return bin_counts
 
 
+    def select_game(self, table: SamplingTable, side: bool) -> tuple[str, float]:
+        game, rng = table.draw_one(side)
+        return str(table.weeks[game]), rng
 
-    def create_histogram(self, league_stats: Stats, side_of_the_ball: str, team: str = None):
-        score = 'sors' if side_of_the_ball == 'offense' else 'sdrs'
-        stats_per_week = league_stats.grab_stats_per_week(team, side_of_the_ball, apply_extra=True)
-        ranks = []
 
-        for team in stats_per_week:
-            for week in stats_per_week[team]:
-                ranks.append(stats_per_week[team][week][side_of_the_ball][score])
-        
-        # Get bin counts
-        bin_distribution = self.histogram_math(ranks)
-        
-        pct = list(bin_distribution.values())
-        keys = list(bin_distribution.keys())
 
-        for team in stats_per_week:
-            for week in stats_per_week[team]:
-                key = self.search(list(bin_distribution.keys()), stats_per_week[team][week][side_of_the_ball][score])
+    def _stat_rows(self, games: Stats, side_of_the_ball: str) -> np.ndarray:
+        return games.week_table(side_of_the_ball).reshape(-1, len(games.season.stat_names))
 
-                if not isinstance(bin_distribution[key], list):
-                    bin_distribution[key] = [week]
-                else:
-                    bin_distribution[key].append(week)
 
-        return bin_distribution, pct, keys
 
+    def _row_points(self, games: Stats, side_of_the_ball: str) -> tuple[float]:
+        """
+        Points of every row of a season's stat matrix for one side of the ball.
+        """
+        key = (games.year, side_of_the_ball)
+        if key not in self.points:
+            rows = self._stat_rows(games, side_of_the_ball)
+            self.points[key] = tuple((rows @ score_weights(games.season.stat_names)).tolist())
 
+        return self.points[key]
 
-    def select_game(self, stats: dict, percentages: list, keys: list, side: bool):
-        rng = random.random() if side else 1 - random.random()
-        idx = self.find(percentages, rng)
-        key = keys[idx]
 
-        if not side:
-            rng = 1 - rng
 
-        return random.choice(stats[key]), rng
+    def _draw_rows(self, off_team: str, off_games: Stats, def_team: str, def_games: Stats) -> tuple[int, float, int, float]:
+        off_row, off_rng = self._in_teams(off_team, off_games, True).draw_row(True)
+        def_row, def_rng = self._in_teams(def_team, def_games, False).draw_row(False)
 
+        nor_rng = 1 / (off_rng + def_rng)
+        return off_row, off_rng * nor_rng, def_row, def_rng * nor_rng
 
 
 
-    def game_stats(self, off_team: str, off_games: dict, def_team: str, def_games: dict):
-        self._in_teams(off_team, off_games, True)
-        self._in_teams(def_team, def_games, False)
+    def game_vector(self, off_team: str, off_games: Stats | int, def_team: str, def_games: Stats | int, out: np.ndarray = None) -> np.ndarray:
+        """
+        Blend a sampled offense game with a sampled defense game into `out`, a
+        float vector in `season.stat_names` order.
+        """
+        off_games = self._season(off_games)
+        def_games = self._season(def_games)
+        off_row, off_rng, def_row, def_rng = self._draw_rows(off_team, off_games, def_team, def_games)
 
-        off_game, off_rng = self.select_game(self.teams[off_team]['offense']['off_stats'], self.teams[off_team]['offense']['off_pct'], self.teams[off_team]['offense']['off_keys'], True)
-        def_game, def_rng = self.select_game(self.teams[def_team]['defense']['def_stats'], self.teams[def_team]['defense']['def_pct'], self.teams[def_team]['defense']['def_keys'], False)
+        out = out if out is not None else np.empty(len(off_games.season.stat_names))
+        np.multiply(self._stat_rows(off_games, 'offense')[off_row], off_rng, out=out)
+        out += self._stat_rows(def_games, 'defense')[def_row] * def_rng
+        return out
 
-        total_rng = off_rng + def_rng
-        nor_rng = 1 / total_rng
-        off_rng = off_rng * nor_rng
-        def_rng = def_rng * nor_rng
 
-        off_game_stats = off_games.year_stats[off_team][off_game]
-        def_game_stats = def_games.year_stats[def_games.year_stats[def_team][def_game]['opp']][def_game]
 
-        return_stats = {}
-        for key in off_game_stats:
-            if key == 'opp':
-                continue
+    def game_points(self, off_team: str, off_games: Stats | int, def_team: str, def_games: Stats | int) -> float:
+        """
+        Points of a blended game. Scoring is linear, so this is the blend of the
+        two games' precomputed points, with nothing allocated per game.
+        """
+        off_games = self._season(off_games)
+        def_games = self._season(def_games)
+        off_row, off_rng, def_row, def_rng = self._draw_rows(off_team, off_games, def_team, def_games)
+        return self._row_points(off_games, 'offense')[off_row] * off_rng + self._row_points(def_games, 'defense')[def_row] * def_rng
+
 
-            return_stats[key] = {}
-            for stat in off_game_stats[key]:
-                return_stats[key][stat] = off_game_stats[key][stat] * off_rng + def_game_stats[key][stat] * def_rng
+
+    def game_stats(self, off_team: str, off_games: Stats | int, def_team: str, def_games: Stats | int):
+        off_games = self._season(off_games)
+        blended = self.game_vector(off_team, off_games, def_team, def_games)
+
+        return_stats = {}
+        for category, stat, value in zip(off_games.season.stat_categories, off_games.season.stat_names, blended.tolist()):
+            return_stats.setdefault(category, {})[stat] = value
         
         return_stats['scoring']['pts'] = score(return_stats['scoring'])
         return return_stats
@@ -151,11 +148,10 @@ class Simulate():
 
 
     def simulate_game(self, home_team, home_stats, away_team, away_stats):
-        home_team_game = self.game_stats(home_team, home_stats, away_team, away_stats)
-        away_team_game = self.game_stats(away_team, away_stats, home_team, home_stats)
-
-        home_pts = home_team_game['scoring']['pts']
-        away_pts = away_team_game['scoring']['pts']
+        home_stats = self._season(home_stats)
+        away_stats = self._season(away_stats)
+        home_pts = self.game_points(home_team, home_stats, away_team, away_stats)
+        away_pts = self.game_points(away_team, away_stats, home_team, home_stats)
 
         if home_pts > away_pts:
             return 1
@@ -166,24 +162,349 @@ class Simulate():
 
 
 
-    def simulate_games(self, home_team, home_stats, away_team, away_stats, game_played):
+    def _batch_points(self, off_team: str, off_games: Stats, def_team: str, def_games: Stats, n: int, rng: np.random.Generator) -> np.ndarray:
+        offense = self._in_teams(off_team, off_games, True)
+        defense = self._in_teams(def_team, def_games, False)
+        off_picks, off_rng = offense.draw(n, True, rng)
+        def_picks, def_rng = defense.draw(n, False, rng)
+
+        stat_count = len(off_games.season.stat_names)
+        off_rows = off_games.week_table('offense').reshape(-1, stat_count)[offense.rows[off_picks]]
+        def_rows = def_games.week_table('defense').reshape(-1, stat_count)[defense.rows[def_picks]]
+
+        nor_rng = 1 / (off_rng + def_rng)
+        blended = off_rows * (off_rng * nor_rng)[:, None] + def_rows * (def_rng * nor_rng)[:, None]
+        return score(dict(zip(off_games.season.stat_names, blended.T)))
+
+
+
+    def simulate_results(self, home_team, home_stats, away_team, away_stats, game_played, rng: np.random.Generator) -> np.ndarray:
+        """
+        Play `game_played` games at once; 1 is a home win, -1 an away win, 0 a tie.
+        """
+        home_stats = self._season(home_stats)
+        away_stats = self._season(away_stats)
+
+        home_pts = self._batch_points(home_team, home_stats, away_team, away_stats, game_played, rng)
+        away_pts = self._batch_points(away_team, away_stats, home_team, home_stats, game_played, rng)
+        return np.sign(home_pts - away_pts).astype(np.int8)
+
+
+
+    def _cache_key(self, home_team: str, home_stats: Stats, away_team: str, away_stats: Stats, game_played: int, seed: int) -> str:
+        for games in (home_stats, away_stats):
+            if games.year not in self.fingerprints:
+                self.fingerprints[games.year] = games.season.fingerprint()
+
+        version = hashlib.sha256(f"{simulation_version()}|{self.fingerprints[home_stats.year]}|{self.fingerprints[away_stats.year]}".encode()).hexdigest()
+        return MatchupCache.key(f"{home_team}-{home_stats.year}", f"{away_team}-{away_stats.year}", game_played, seed, version)
+
+
+
+    def _map_shards(self, function, shards: list, workers: int = None) -> list:
+        if workers is None or workers <= 1 or len(shards) <= 1:
+            return [function(shard, self) for shard in shards]
+
+        # One pool is kept across calls, so workers keep their warmed seasons
+        if self.pool is None or self.pool_workers != workers:
+            self.close()
+            self.pool = mp.Pool(workers)
+            self.pool_workers = workers
+
+        return self.pool.map(function, shards)
+
+
+
+    def close(self) -> None:
+        """
+        Shut down the worker pool, if one was started.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+            self.pool_workers = None
+
+
+
+    def simulate_games_counts(self, home_team, home_stats, away_team, away_stats, game_played, seed: int = None, workers: int = None) -> tuple[int, int, int]:
+        """
+        Play `game_played` games and return (home wins, away wins, ties).
+
+        The games are split into fixed-size shards, each with its own stream
+        spawned from `seed`, so the counts for a seed are the same whether the
+        shards run here or across `workers` processes. That also makes seeded
+        counts reusable, so they are looked up in and saved to `self.cache`.
+        """
+        home_stats = self._season(home_stats)
+        away_stats = self._season(away_stats)
+        matchup = (home_team, home_stats.year, away_team, away_stats.year)
+
+        key = None
+        if self.cache is not None and seed is not None:
+            key = self._cache_key(home_team, home_stats, away_team, away_stats, game_played, seed)
+            counts = self.cache.get(key)
+            if counts is not None:
+                return counts
+
+        results = np.concatenate(self._map_shards(partial(_matchup_shard, matchup), _shards(game_played, seed), workers))
+        home_wins = int(np.sum(results > 0))
+        away_wins = int(np.sum(results < 0))
+        counts = (home_wins, away_wins, game_played - home_wins - away_wins)
+
+        if key is not None:
+            self.cache.put(key, counts)
+
+        return counts
+
+
+
+    def simulate_schedule(self, schedule: list, seed: int = None, workers: int = None) -> np.ndarray:
+        """
+        Play every `[home, home_year, "vs", away, away_year]` game of a schedule
+        and return the results in schedule order (1 home win, -1 away win, 0 tie).
+
+        Results do not depend on ratings, so all games can be played up front,
+        sharded across `workers` processes like `simulate_games_counts`.
+        """
+        teams = list(dict.fromkeys((game[i], game[i + 1]) for game in schedule for i in (0, 3)))
+        index = {team: i for i, team in enumerate(teams)}
+        home = np.array([index[(game[0], game[1])] for game in schedule], dtype=np.int32)
+        away = np.array([index[(game[3], game[4])] for game in schedule], dtype=np.int32)
+        return self.simulate_indexed(teams, home, away, seed, workers)
+
+
+
+    def simulate_indexed(self, teams: list[tuple[str, int]], home: np.ndarray, away: np.ndarray, seed: int = None, workers: int = None, shard_games: int = SCHEDULE_SHARD_GAMES) -> np.ndarray:
+        """
+        `simulate_schedule` for games given as indices into `teams`, a list of
+        `(team, year)` pairs. Results depend on `shard_games` but not on
+        `workers`.
+        """
+        blocks = []
+        start = 0
+        for size, shard_seed in _shards(len(home), seed, shard_games):
+            blocks.append((teams, home[start:start + size], away[start:start + size], shard_seed))
+            start += size
+
+        return np.concatenate(self._map_shards(_indexed_shard, blocks, workers))
+
+
+
+    def simulate_pairs(self, pairs: list[tuple[str, int, str, int]], game_played: int, seed: int = None, workers: int = None) -> np.ndarray:
+        """
+        Play `game_played` games for each `(home, home_year, away, away_year)`
+        pair, each pair with its own stream spawned from `seed`.
+
+        Returns:
+            One (home wins, away wins, ties) row per pair
+        """
+        games = [(pair, game_played, pair_seed) for pair, pair_seed in zip(pairs, np.random.SeedSequence(seed).spawn(len(pairs)))]
+        counts = self._map_shards(_pair_shard, games, workers)
+        return np.array(counts, dtype=np.int64).reshape(len(pairs), 3)
+
+
+
+    def simulate_games_adaptive(self, home_team, home_stats, away_team, away_stats, max_games: int = 10_000, error: float = 0.05, batch_size: int = ADAPTIVE_BATCH, seed: int = None) -> tuple[float, tuple[float, float], int]:
+        """
+        Play games in batches of `batch_size` until the winner is settled or
+        `max_games` have been played.
+
+        Each game scores 1 for a home win, 0.5 for a tie and 0 for a loss. After
+        every batch a normal interval is put around the mean score, at an error
+        rate of `error` split evenly over every batch that could be played, so
+        stopping as soon as it excludes 0.5 still picks the wrong winner with
+        probability at most about `error`.
+
+        Returns:
+            The home team's expected score, its interval and the games played
+        """
+        home_stats = self._season(home_stats)
+        away_stats = self._season(away_stats)
+        shards = _shards(max_games, seed, batch_size)
+        z = NormalDist().inv_cdf(1 - error / (2 * len(shards)))
+
+        total = 0.0
+        squares = 0.0
+        games = 0
+        for size, shard_seed in shards:
+            results = self.simulate_results(home_team, home_stats, away_team, away_stats, size, np.random.default_rng(shard_seed))
+            points = (results + 1) / 2
+            total += float(points.sum())
+            squares += float((points * points).sum())
+            games += size
+
+            estimate = total / games
+            width = z * (max(squares / games - estimate * estimate, 0) / games) ** 0.5
+            low, high = max(estimate - width, 0.0), min(estimate + width, 1.0)
+            if low > 0.5 or high < 0.5:
+                break
+
+        return estimate, (low, high), games
+
+
+
+    def simulate_games(self, home_team, home_stats, away_team, away_stats, game_played, batch: bool = True, seed: int = None, workers: int = None, adaptive: bool = False, error: float = 0.05):
+        """
+        Return the team that wins more of `game_played` games, or "TIED". With
+        `adaptive` the games stop early once the winner is settled at the
+        `error` rate, see `simulate_games_adaptive`.
+        """
+        home_stats = self._season(home_stats)
+        away_stats = self._season(away_stats)
         home_wins = 0
         away_wins = 0
         ties = 0
-        
-        for _ in tqdm(range(game_played), desc=f"Simulating {home_team} vs {away_team}", leave=False):
-            winner = self.simulate_game(home_team, home_stats, away_team, away_stats)
 
-            if winner > 0:
-                home_wins += 1
-            elif winner < 0:
-                away_wins += 1
-            else:
-                ties += 1
-        
-        if home_wins > away_wins:
-            return home_team
-        elif away_wins > home_wins:
-            return away_team
+        if adaptive:
+            estimate, _, _ = self.simulate_games_adaptive(home_team, home_stats, away_team, away_stats, game_played, error, seed=seed)
+            home_wins, away_wins = estimate > 0.5, estimate < 0.5
+        elif batch:
+            home_wins, away_wins, ties = self.simulate_games_counts(home_team, home_stats, away_team, away_stats, game_played, seed, workers)
         else:
-            return "TIED"
\ No newline at end of file
+            for _ in tqdm(range(game_played), desc=f"Simulating {home_team} vs {away_team}", leave=False):
+                winner = self.simulate_game(home_team, home_stats, away_team, away_stats)
+
+                if winner > 0:
+                    home_wins += 1
+                elif winner < 0:
+                    away_wins += 1
+                else:
+                    ties += 1
+        
+        return _winner(home_team, away_team, home_wins, away_wins)
+
+
+
+    def simulate_round(self, matchups: list[tuple[str, int, str, int]], game_played: int, seed: int = None, workers: int = None) -> list[str]:
+        """
+        `simulate_games` for every `(home, home_year, away, away_year)` matchup
+        of a bracket round, with the matchups spread over `workers` processes.
+
+        Returns:
+            The `"TEAM-YEAR"` id of every matchup's winner in matchup order, so
+            two seasons of one franchise stay apart, or None for a tie
+        """
+        counts = [None] * len(matchups)
+        keys = [None] * len(matchups)
+        if self.cache is not None and seed is not None:
+            for i, (home_team, home_year, away_team, away_year) in enumerate(matchups):
+                keys[i] = self._cache_key(home_team, self._season(home_year), away_team, self._season(away_year), game_played, seed)
+                counts[i] = self.cache.get(keys[i])
+
+        missing = [i for i, count in enumerate(counts) if count is None]
+        played = self._map_shards(_round_shard, [(matchups[i], game_played, seed) for i in missing], workers)
+        for i, count in zip(missing, played):
+            counts[i] = count
+            if keys[i] is not None and keys[i] not in self.cache:
+                self.cache.put(keys[i], count, save=False)
+
+        if self.cache is not None and any(keys[i] is not None for i in missing):
+            self.cache.save()
+
+        winners = []
+        for (home_team, home_year, away_team, away_year), (home_wins, away_wins, _) in zip(matchups, counts):
+            if home_wins > away_wins:
+                winners.append(f"{home_team}-{home_year}")
+            elif away_wins > home_wins:
+                winners.append(f"{away_team}-{away_year}")
+            else:
+                winners.append(None)
+
+        return winners
+
+
+
+_worker_simulate = None
+_simulation_version = None
+
+
+
+def simulation_version() -> str:
+    """
+    Hash of the scoring and sampling code a matchup result depends on, so
+    cached results are not reused once any of it changes.
+    """
+    global _simulation_version
+    if _simulation_version is None:
+        digest = hashlib.sha256(Stats.tables_version().encode())
+        for source in (SamplingTable.draw, SamplingTable._games, Simulate._batch_points, Simulate.simulate_results, _shards, _matchup_shard):
+            digest.update(inspect.getsource(source).encode())
+        digest.update(str(SHARD_GAMES).encode())
+        _simulation_version = digest.hexdigest()
+
+    return _simulation_version
+
+
+
+def _shards(game_played: int, seed: int = None, shard_games: int = SHARD_GAMES) -> list[tuple[int, np.random.SeedSequence]]:
+    """
+    Split `game_played` games into shards of at most `shard_games`, each with
+    an independent seed spawned from `seed`.
+    """
+    count = max(1, -(-game_played // shard_games))
+    sizes = [shard_games] * (count - 1) + [game_played - shard_games * (count - 1)]
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(count)))
+
+
+
+def _winner(home_team: str, away_team: str, home_wins: int, away_wins: int) -> str:
+    if home_wins > away_wins:
+        return home_team
+    elif away_wins > home_wins:
+        return away_team
+    else:
+        return "TIED"
+
+
+
+def _shard_simulate(simulate: Simulate = None) -> Simulate:
+    global _worker_simulate
+    if simulate is not None:
+        return simulate
+
+    if _worker_simulate is None:
+        _worker_simulate = Simulate()
+
+    return _worker_simulate
+
+
+
+def _matchup_shard(matchup: tuple, shard: tuple, simulate: Simulate = None) -> np.ndarray:
+    home_team, home_year, away_team, away_year = matchup
+    size, seed = shard
+    return _shard_simulate(simulate).simulate_results(home_team, home_year, away_team, away_year, size, np.random.default_rng(seed))
+
+
+
+def _round_shard(game: tuple, simulate: Simulate = None) -> tuple[int, int, int]:
+    (home_team, home_year, away_team, away_year), size, seed = game
+    return _shard_simulate(simulate).simulate_games_counts(home_team, home_year, away_team, away_year, size, seed)
+
+
+
+def _pair_shard(game: tuple, simulate: Simulate = None) -> tuple[int, int, int]:
+    (home_team, home_year, away_team, away_year), size, seed = game
+    results = _shard_simulate(simulate).simulate_results(home_team, home_year, away_team, away_year, size, np.random.default_rng(seed))
+    home_wins = int(np.sum(results > 0))
+    away_wins = int(np.sum(results < 0))
+    return home_wins, away_wins, size - home_wins - away_wins
+
+
+
+def _indexed_shard(block: tuple, simulate: Simulate = None) -> np.ndarray:
+    teams, home, away, seed = block
+    simulate = _shard_simulate(simulate)
+    rng = np.random.default_rng(seed)
+
+    # Play every game of a pair in one batch
+    pairs, inverse, counts = np.unique(home.astype(np.int64) * len(teams) + away, return_inverse=True, return_counts=True)
+    positions = np.split(np.argsort(inverse, kind='stable'), np.cumsum(counts)[:-1])
+
+    results = np.zeros(len(home), dtype=np.int8)
+    for pair, pair_positions in zip(pairs.tolist(), positions):
+        home_team, home_year = teams[pair // len(teams)]
+        away_team, away_year = teams[pair % len(teams)]
+        results[pair_positions] = simulate.simulate_results(home_team, home_year, away_team, away_year, len(pair_positions), rng)
+
+    return results
@@ -1,5 +1,9 @@
-from stats import Stats
+import multiprocessing as mp
 from simulate import Simulate
+from matchup_cache import MatchupCache
+from win_matrix import WinMatrix
+from tournament import exact_tournament
+from bracket_engine import ArrayBracket
 from playoff_bracket import generate_playoff_bracket, print_bracket, get_round_matchups, update_bracket
 
 # YEAR = 2023
@@ -47,35 +51,45 @@ byes_per_conf = {
     "NFC": 0
 }
 
-stats = {}
-simulate = Simulate()
+# Seeded runs are cached on disk, so rerunning with new seedings or byes only
+# simulates the pairs that have not been played before
+SEED = 0
 
-# Generate bracket
-bracket = generate_playoff_bracket(conferences, byes_per_conf)
-print_bracket(bracket)
+# Complete brackets to play for round by round advancement odds, 0 to skip
+BRACKETS = 1_000_000
 
-for rnd in range(1, 6):
-    matchups = get_round_matchups(bracket, rnd)
-    
-    for idx, game in enumerate(matchups):
-        home_team = game['team1'][:3]
-        home_year = game['team1_year']
-        away_team = game['team2'][:3]
-        away_year = game['team2_year']
+if __name__ == '__main__':
+    simulate = Simulate(cache=MatchupCache())
 
-        if home_year == away_year:
-            if home_year not in stats:
-                stats[home_year] = Stats(home_year)
-        else:
-            if home_year not in stats:
-                stats[home_year] = Stats(home_year)
-            
-            if away_year not in stats:
-                stats[away_year] = Stats(away_year)
-        
+    # Generate bracket
+    bracket = generate_playoff_bracket(conferences, byes_per_conf)
+    print_bracket(bracket)
 
-        winner = simulate.simulate_games(home_team, stats[home_year], away_team, stats[away_year], 10_000)
-        winner_year = home_year if winner == home_team else away_year
-        update_bracket(bracket, rnd, idx, f"{winner}-{winner_year}")
-    
-print_bracket(bracket)
+    for rnd in range(1, 6):
+        matchups = get_round_matchups(bracket, rnd)
+        played = [idx for idx, game in enumerate(matchups) if game['winner'] is None]
+        games = [(matchups[idx]['team1'][:3], matchups[idx]['team1_year'], matchups[idx]['team2'][:3], matchups[idx]['team2_year']) for idx in played]
+
+        # The round's matchups are independent, so they are played together and
+        # their winners applied in order once all are done
+        winners = simulate.simulate_round(games, 10_000, seed=SEED, workers=mp.cpu_count())
+
+        for idx, winner in zip(played, winners):
+            # A tied series goes to the higher seed, who is always team1
+            if winner is None:
+                winner = matchups[idx]['team1']
+                print(f"Round {rnd} matchup {idx + 1} tied, {winner} advances as the higher seed")
+
+            update_bracket(bracket, rnd, idx, winner)
+
+    print_bracket(bracket)
+
+    if BRACKETS:
+        # Every pair is simulated once, then each bracket only draws from the table
+        matrix = WinMatrix.simulate(list(bracket["team_info"]), 10_000, SEED, simulate=simulate)
+        odds = ArrayBracket(conferences, byes_per_conf).tournament(matrix, BRACKETS, SEED)
+        odds["exact_champion"] = exact_tournament(conferences, byes_per_conf, matrix)["champion"]
+        print(f"\nAdvancement odds over {BRACKETS} brackets:")
+        print(odds.to_string(float_format=lambda x: f"{x:.3f}"))
+
+    simulate.close()
@@ -1,3 +1,7 @@
+import numpy as np
+
+
+
 def pct(numerator: int, denominator: int) -> float:
         if denominator == 0:
             return 0
@@ -15,6 +19,9 @@ def per_att(stat: int, att: int) -> float:
 
 
 def qbr(cmp: int, att: int, yds: int, td: int, int: int) -> float:
+    if att == 0:
+        return 0
+    
     a = ( ( cmp / att * 100 ) - 30 ) * 0.05
     b = ( ( yds / att ) - 3 ) * 0.25
     c = ( td / att * 100 ) * 0.2
@@ -86,6 +93,15 @@ def score(stats: dict[str, int]) -> int:
 
 
 
+def score_weights(stat_names: list[str]) -> np.ndarray:
+    """
+    Points per unit of each stat, in `stat_names` order. `score` is linear, so
+    `rows @ score_weights(names)` scores every row of a stat matrix at once.
+    """
+    return np.asarray(score(dict(zip(stat_names, np.eye(len(stat_names))))), dtype=float)
+
+
+
 def _passing_pct(stats: dict[str, int]) -> None:
     att = stats['p_att']
     stats['cmp%'] = pct(stats['cmp'], att)
@@ -114,4 +130,73 @@ def _pressure_pct(stats: dict[str, int]) -> None:
 
 def _conversions_pct(stats: dict[str, int]) -> None:
     stats['3d%'] = pct(stats['3dc'], stats['3da'])
-    stats['4d%'] = pct(stats['4dc'], stats['4da'])
\ No newline at end of file
+    stats['4d%'] = pct(stats['4dc'], stats['4da'])
+
+
+
+# Batch counterparts. Each takes whole stat columns (arrays covering any number
+# of team-weeks) and returns arrays, giving 0 wherever the scalar version would
+# for a zero denominator. `score` and the `_*_fantasy_points` functions are
+# linear, so they already accept a dict of column arrays as is.
+
+def pct_batch(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    numerator, denominator = np.broadcast_arrays(np.asarray(numerator, dtype=float), np.asarray(denominator, dtype=float))
+    result = np.divide(numerator, denominator, out=np.zeros(numerator.shape), where=denominator != 0)
+    return result * 100
+
+
+
+def per_att_batch(stat: np.ndarray, att: np.ndarray) -> np.ndarray:
+    stat, att = np.broadcast_arrays(np.asarray(stat, dtype=float), np.asarray(att, dtype=float))
+    return np.divide(stat, att, out=np.zeros(stat.shape), where=att != 0)
+
+
+
+def qbr_batch(cmp: np.ndarray, att: np.ndarray, yds: np.ndarray, td: np.ndarray, int: np.ndarray) -> np.ndarray:
+    has_att = np.asarray(att) != 0
+    att = np.where(has_att, att, 1)
+
+    a = ( ( cmp / att * 100 ) - 30 ) * 0.05
+    b = ( ( yds / att ) - 3 ) * 0.25
+    c = ( td / att * 100 ) * 0.2
+    d = 2.375 - ( ( int / att * 100) * 0.25 )
+    
+    a = np.maximum(0, np.minimum(a, 2.375))
+    b = np.maximum(0, np.minimum(b, 2.375))
+    c = np.maximum(c, 2.375)
+    d = np.maximum(0, d)
+
+    rate = ( ( a + b + c + d ) / 6 ) * 100
+    return np.where(has_att, rate, 0)
+
+
+
+def _passing_pct_batch(stats: dict[str, np.ndarray]) -> None:
+    att = stats['p_att']
+    stats['cmp%'] = pct_batch(stats['cmp'], att)
+    stats['p_y/a'] = per_att_batch(stats['p_yds'], att)
+    stats['p_td%'] = pct_batch(stats['p_td'], att)
+    stats['p_int%'] = pct_batch(stats['int'], att)
+    stats['p_1d%'] = pct_batch(stats['p_1d'], att)
+    stats['rate'] = qbr_batch(stats['cmp'], att, stats['p_yds'], stats['p_td'], stats['int'])
+
+
+
+def _rushing_pct_batch(stats: dict[str, np.ndarray]) -> None:
+    att = stats['r_att']
+    stats['r_y/a'] = per_att_batch(stats['r_yds'], att)
+    stats['r_td%'] = pct_batch(stats['r_td'], att)
+    stats['fum%'] = pct_batch(stats['fum'], att)
+    stats['r_1d%'] = pct_batch(stats['r_1d'], att)
+
+
+
+def _pressure_pct_batch(stats: dict[str, np.ndarray]) -> None:
+    stats['y/s'] = per_att_batch(stats['s_yds'], stats['sk'])
+    stats['sk%'] = pct_batch(stats['sk'], stats['p_att'])
+
+
+
+def _conversions_pct_batch(stats: dict[str, np.ndarray]) -> None:
+    stats['3d%'] = pct_batch(stats['3dc'], stats['3da'])
+    stats['4d%'] = pct_batch(stats['4dc'], stats['4da'])
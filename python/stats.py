@@ -1,34 +1,277 @@
+import os
 import pickle
+import hashlib
+import inspect
+import zipfile
+import tempfile
+
+import numpy as np
+import pandas as pd
+import multiprocessing as mp
+from functools import partial
 
 from display import Display
+from season_store import SeasonStore
+from season_archive import open_archive
+from season_registry import get_season
+from sampling_table import SamplingTable, bin_edges
+import special
 from special import score, _passing_pct, _rushing_pct, _pressure_pct, _conversions_pct, _pass_fantasy_points, _run_fantasy_points, _pressure_fantasy_points, _conversions_fantasy_points, _penalties_fantasy_pints
+from special import _passing_pct_batch, _rushing_pct_batch, _pressure_pct_batch, _conversions_pct_batch
+
+# Rough cost of one stat value in the legacy nested-dict view
+YEAR_STATS_BYTES_PER_VALUE = 100
+
+DERIVED_PATH = "npz/{year} NFL Team Stats.derived.npz"
+TABLES_PATH = "npz/{year} NFL Team Stats.tables.npz"
+
+# What np.load raises on a missing key or a half written or corrupt file
+UNREADABLE_NPZ = (OSError, ValueError, EOFError, KeyError, zipfile.BadZipFile)
+
+
+
+def _save_npz(path: str, **arrays) -> None:
+    """
+    Write an npz through a temp file of this process's own, then move it into
+    place, so concurrent writers never see or clobber a partial file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp.npz")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 
 class Stats:
 
-    def __init__(self, year: int):
+    def __init__(self, year: int, season: SeasonStore = None):
         self.year = year
-        self.year_stats = self._load_stats()
+        self.season = season if season is not None else self._load_stats()
+        self._year_stats = None
+        self._derived = None
+        self._tables = None
+        self._prefix = None
+        self._week_tables = None
+        self._records = None
     
 
 
-    def _load_stats(self):
+    def _load_stats(self) -> SeasonStore:
+        archive = open_archive()
+        if archive is not None and self.year in archive:
+            return archive.season(self.year)
+
+        path = f"npz/{self.year} NFL Team Stats.npz"
+        if os.path.exists(path):
+            return SeasonStore.load(path)
+
         with open(f"pickle/{self.year} NFL Team Stats.pkl", "rb") as pkl:
-            return pickle.load(pkl)
+            return SeasonStore.from_year_stats(pickle.load(pkl))
+
+
+
+    @property
+    def year_stats(self) -> dict:
+        if self._year_stats is None:
+            self._year_stats = self.season.to_year_stats()
+
+        return self._year_stats
+
+
+
+    def nbytes(self) -> int:
+        season = self.season
+        total = season.stats.nbytes + season.opponents.nbytes + season.weeks.nbytes + season.played.nbytes
+
+        if self._year_stats is not None:
+            total += season.stats.size * YEAR_STATS_BYTES_PER_VALUE
+        
+        if self._derived is not None:
+            total += self._derived[1].nbytes
+
+        if self._tables is not None:
+            total += sum(table.weeks.nbytes * 3 for sides in self._tables.values() for table in sides.values())
+
+        if self._prefix is not None:
+            total += sum(array.nbytes for array in self._prefix.values())
+
+        if self._records is not None:
+            total += sum(array.nbytes for array in self._records.values())
+        
+        return total
+
+
+
+    @staticmethod
+    def derived_version() -> str:
+        """
+        Hash of the code the per-week derived metrics are computed with, used
+        to invalidate persisted metrics when the scoring changes.
+        """
+        functions = (
+            special.pct, special.per_att, special.qbr, special.score,
+            _passing_pct, _rushing_pct, _pressure_pct, _conversions_pct,
+            special.pct_batch, special.per_att_batch, special.qbr_batch,
+            _passing_pct_batch, _rushing_pct_batch, _pressure_pct_batch, _conversions_pct_batch,
+            _pass_fantasy_points, _run_fantasy_points, _pressure_fantasy_points, _conversions_fantasy_points, _penalties_fantasy_pints,
+            Stats.apply_pct, Stats.fantasy_points, Stats.simple_team_rating, Stats._process_stats, Stats._compute_derived
+        )
+
+        digest = hashlib.sha256()
+        for function in functions:
+            digest.update(inspect.getsource(function).encode())
+
+        return digest.hexdigest()
+
+
+
+    def _compute_derived(self) -> tuple[list[str], np.ndarray]:
+        season = self.season
+        stats = self._columns(season.stats)
+        self._process_stats(stats, list(season.categories), 'offense', batch=True)
+
+        names = [stat for stat in stats if stat not in season.stat_index]
+        values = np.stack([stats[stat] for stat in names], axis=-1).astype(float)
+        return names, values * season.played[..., None]
+
+
 
+    def _load_derived(self) -> tuple[list[str], np.ndarray]:
+        path = DERIVED_PATH.format(year=self.year)
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            with np.load(path) as data:
+                if str(data['version']) != self.derived_version() or str(data['season']) != self.season.fingerprint():
+                    return None
+                
+                return data['names'].tolist(), data['values']
+        except UNREADABLE_NPZ:
+            return None
+
+
+
+    def _save_derived(self) -> None:
+        path = DERIVED_PATH.format(year=self.year)
+        names, values = self._derived
+        _save_npz(path, version=self.derived_version(), season=self.season.fingerprint(), names=np.array(names), values=values)
+
+
+
+    def derived_stats(self, refresh: bool = False) -> tuple[list[str], np.ndarray]:
+        """
+        Per team-week metrics (`cmp%`, `rate`, fantasy points, `pts`, `sors`, ...)
+        for the offense of every team, computed once with all stat categories and
+        persisted next to the season. A team's defensive metrics for a week are
+        its opponent's offensive ones.
+        """
+        if self._derived is None or refresh:
+            self._derived = None if refresh else self._load_derived()
+
+            if self._derived is None:
+                self._derived = self._compute_derived()
+                self._save_derived()
+        
+        return self._derived
+
+
+
+    @staticmethod
+    def tables_version() -> str:
+        """
+        Hash of the derived metrics and of the binning the sampling tables are
+        built with.
+        """
+        digest = hashlib.sha256(Stats.derived_version().encode())
+        for function in (bin_edges, SamplingTable.from_ratings, SamplingTable.pack, Stats._compute_sampling_tables):
+            digest.update(inspect.getsource(function).encode())
+
+        return digest.hexdigest()
+
+
+
+    def _compute_sampling_tables(self) -> dict[str, dict[str, SamplingTable]]:
+        season = self.season
+        names, values = self.derived_stats()
+        sors = values[..., names.index('sors')]
 
+        # A team's defensive rating for a week is its opponent's offensive one
+        weeks = np.arange(len(season.weeks))
+        ratings = {'offense': sors, 'defense': sors[season.opponents, weeks]}
 
-    def apply_pct(self, stats: dict[str, int], stat_type: set[str]) -> None:
+        tables = {}
+        for t, team in enumerate(season.teams):
+            played = np.flatnonzero(season.played[t])
+            if len(played) == 0:
+                continue
+
+            week_numbers = season.weeks[played].astype(np.int64)
+            rows = t * len(season.weeks) + played
+            tables[team] = {side: SamplingTable.from_ratings(rating[t, played], week_numbers, rows) for side, rating in ratings.items()}
+
+        return tables
+
+
+
+    def _load_sampling_tables(self) -> dict[str, dict[str, SamplingTable]]:
+        path = TABLES_PATH.format(year=self.year)
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            with np.load(path) as data:
+                if str(data['version']) != self.tables_version() or str(data['season']) != self.season.fingerprint():
+                    return None
+
+                teams = data['teams'].tolist()
+                tables = SamplingTable.unpack(data)
+        except UNREADABLE_NPZ:
+            return None
+
+        return {team: {'offense': tables[2 * i], 'defense': tables[2 * i + 1]} for i, team in enumerate(teams)}
+
+
+
+    def _save_sampling_tables(self) -> None:
+        path = TABLES_PATH.format(year=self.year)
+        teams = list(self._tables)
+        tables = [self._tables[team][side] for team in teams for side in ('offense', 'defense')]
+        _save_npz(path, version=self.tables_version(), season=self.season.fingerprint(), teams=np.array(teams), **SamplingTable.pack(tables))
+
+
+
+    def sampling_tables(self, refresh: bool = False) -> dict[str, dict[str, SamplingTable]]:
+        """
+        Every team's offense and defense `SamplingTable`, binned on the weekly
+        `sors` (offense) and `sors` allowed (defense) of the whole season in one
+        pass and persisted next to the season.
+        """
+        if self._tables is None or refresh:
+            self._tables = None if refresh else self._load_sampling_tables()
+
+            if self._tables is None:
+                self._tables = self._compute_sampling_tables()
+                self._save_sampling_tables()
+        
+        return self._tables
+
+
+
+    def apply_pct(self, stats: dict[str, int], stat_type: set[str], batch: bool = False) -> None:
         for stat in stat_type:
             if stat == 'passing':
-                _passing_pct(stats)
+                _passing_pct_batch(stats) if batch else _passing_pct(stats)
             elif stat == 'rushing':
-                _rushing_pct(stats)
+                _rushing_pct_batch(stats) if batch else _rushing_pct(stats)
             elif stat == 'pressure':
-                _pressure_pct(stats)
+                _pressure_pct_batch(stats) if batch else _pressure_pct(stats)
             elif stat == 'conversions':
-                _conversions_pct(stats)
+                _conversions_pct_batch(stats) if batch else _conversions_pct(stats)
 
 
 
@@ -60,107 +303,108 @@ class Stats:
 
 
 
-    def add_records(self, teams: list[str], stats: dict, start_week: int = None, end_week: int = None, custom_range: set[int] = None) -> None:
-        for team in teams:
-            
-            wins = 0
-            losses = 0
-            ties = 0
+    def _columns(self, rows: np.ndarray) -> dict[str, np.ndarray]:
+        return {stat: rows[..., i] for i, stat in enumerate(self.season.stat_names)}
 
-            for week in self.year_stats[team]:
-                
-                if start_week is not None and end_week is not None and not start_week <= int(week) <= end_week:
-                    continue
-                
-                elif custom_range is not None and int(week) not in custom_range:
-                    continue
-                
-                opp = self.year_stats[team][week]['opp']
-                off_pts = score(self.year_stats[team][week]['scoring'])
-                def_pts = score(self.year_stats[opp][week]['scoring'])
-
-                if off_pts > def_pts:
-                    wins += 1
-                elif def_pts > off_pts:
-                    losses += 1
-                else:
-                    ties += 1
-                
-            stats[team]['record'] = {'gp': wins + losses + ties, 'wins': wins, 'losses': losses, 'ties': ties}
 
 
+    def _results(self) -> dict[str, np.ndarray]:
+        """
+        Per team-week points for and against, and the game result (1 win,
+        -1 loss, 0 tie or no game), built once per season.
+        """
+        if self._records is None:
+            season = self.season
+            weeks = np.arange(len(season.weeks))
+            points = score(self._columns(season.stats))
+            opp_points = np.where(season.played, points[season.opponents, weeks], 0)
 
-    def _in_week_range(self, week: int, start_week: int, end_week: int, custom_range: set[int]) -> bool:
-        if start_week is not None and not week >= start_week:
-            return False
-        
-        elif end_week is not None and not week <= end_week:
-            return False
+            self._records = {
+                'points': points,
+                'opp_points': opp_points,
+                'result': np.sign(points - opp_points).astype(np.int8) * season.played
+            }
         
-        elif custom_range is not None and int(week) not in custom_range:
-            return False
-        
-        else:
-            return True
+        return self._records
 
 
 
-    def _which_stats(self, team: str, week: int, side_of_the_ball: str, stats: dict, per_week = False) -> list[str]:
-        if side_of_the_ball is None:
-            look_at = [team, self.year_stats[team][week]['opp']]
+    def add_records(self, teams: list[str], stats: dict, start_week: int = None, end_week: int = None, custom_range: set[int] = None) -> None:
+        season = self.season
+        teams = list(teams)
+        week_mask = np.ones(len(season.weeks), dtype=bool)
+
+        if start_week is not None and end_week is not None:
+            week_mask &= (season.weeks >= start_week) & (season.weeks <= end_week)
+        
+        if custom_range is not None:
+            week_mask &= np.isin(season.weeks, list(custom_range))
+
+        idx = np.array([season.team_index[team] for team in teams], dtype=np.intp)
+        games = season.played[idx] & week_mask
+        result = self._results()['result'][idx]
 
-            if not per_week and 'offense' not in stats[team]:
-                    stats[team]['offense'] = {} 
-                    stats[team]['defense'] = {}
+        wins = ((result > 0) & games).sum(axis=1).tolist()
+        losses = ((result < 0) & games).sum(axis=1).tolist()
+        gp = games.sum(axis=1).tolist()
 
-        elif side_of_the_ball == 'offense':
-            look_at = [team]
+        for team, team_wins, team_losses, team_gp in zip(teams, wins, losses, gp):
+            stats[team]['record'] = {'gp': team_gp, 'wins': team_wins, 'losses': team_losses, 'ties': team_gp - team_wins - team_losses}
 
-            if not per_week and 'offense' not in stats[team]:
-                stats[team]['offense'] = {}
 
-        else:
-            look_at = [self.year_stats[team][week]['opp']]
 
-            if not per_week and 'defense' not in stats[team]:
-                stats[team]['defense'] = {}
+    def _in_week_range(self, start_week: int, end_week: int, custom_range: set[int]) -> np.ndarray:
+        weeks = self.season.weeks
+        in_range = np.ones(len(weeks), dtype=bool)
+
+        if start_week is not None:
+            in_range &= weeks >= start_week
         
-        return look_at
+        if end_week is not None:
+            in_range &= weeks <= end_week
+        
+        if custom_range is not None:
+            in_range &= np.isin(weeks, list(custom_range))
+        
+        return in_range
 
 
 
-    def _add_stats(self, team: str, look_at: list[str], week: int, stat_type: set[str]) -> dict:
-        stats = {}
+    def _team_weeks(self, team: str, start_week: int, end_week: int, custom_range: set[int]) -> np.ndarray:
+        t = self.season.team_index[team]
+        played = self.season.played[t]
 
-        for current_team in look_at:
-            key = 'offense' if current_team == team else 'defense'
-            stats[key] = {}
-            
-            for stat_catagorie in stat_type:
+        if start_week is not None and start_week > self.season.weeks[played].max():
+            return None
 
-                if stat_catagorie == 'opp':
-                    continue
+        return np.flatnonzero(played & self._in_week_range(start_week, end_week, custom_range))
 
-                for stat, value in self.year_stats[current_team][week][stat_catagorie].items():
-                    stats[key][stat] = value
-        
-        return stats
 
 
+    def _which_stats(self, team: str, weeks: np.ndarray, side_of_the_ball: str, table: np.ndarray = None) -> dict[str, np.ndarray]:
+        t = self.season.team_index[team]
+        look_at = {}
+
+        if side_of_the_ball is None or side_of_the_ball == 'offense':
+            look_at['offense'] = (table if table is not None else self.season.stats)[t, weeks]
+
+        if side_of_the_ball is None or side_of_the_ball == 'defense':
+            if table is None:
+                look_at['defense'] = self._prefix_sums()['allowed'][t, weeks]
+            else:
+                look_at['defense'] = table[self.season.opponents[t, weeks], weeks]
+        
+        return look_at
+
 
-    def combine_stats(self, returned_stats: dict, week_stats: dict) -> None:
-        for side in week_stats:
-            for stat, value in week_stats[side].items():
 
-                if stat not in returned_stats[side]:
-                    returned_stats[side][stat] = value
-                else:
-                    returned_stats[side][stat] += value
+    def _add_stats(self, values: list[int], columns: np.ndarray) -> dict:
+        return {self.season.stat_names[c]: value for c, value in zip(columns, values)}
 
 
 
-    def _process_stats(self, stats, stat_type, side):
-        self.apply_pct(stats, stat_type)
+    def _process_stats(self, stats, stat_type, side, batch = False):
+        self.apply_pct(stats, stat_type, batch)
         self.fantasy_points(stats, stat_type)
         stats['pts'] = score(stats)
         self.simple_team_rating(stats, side)
@@ -178,39 +422,98 @@ class Stats:
                     self._process_stats(stats, stat_type, side)
 
 
+    def _apply_special_stats_batch(self, returned_stats: dict, stat_type: set[str], totals: dict[str, np.ndarray], sides: list[str], columns: np.ndarray) -> None:
+        teams = [team for team, team_stats in returned_stats.items() if team_stats]
+        if not teams:
+            return
+        
+        idx = np.array([self.season.team_index[team] for team in teams], dtype=np.intp)
+
+        for side in sides:
+            stats = {self.season.stat_names[c]: totals[side][idx, c] for c in columns}
+            stats['gp'] = totals['gp'][idx]
+            self._process_stats(stats, stat_type, side, batch=True)
+
+            extra = [stat for stat in stats if stat not in returned_stats[teams[0]][side]]
+            for team, values in zip(teams, zip(*[stats[stat].tolist() for stat in extra])):
+                returned_stats[team][side].update(zip(extra, values))
+
+
+
+    def _prefix_sums(self) -> dict[str, np.ndarray]:
+        """
+        Cumulative per-team sums over the week axis, with a leading zero week,
+        so the total over week columns [lo, hi) is `cum[:, hi] - cum[:, lo]`.
+        """
+        if self._prefix is None:
+            season = self.season
+            weeks = np.arange(len(season.weeks))
+            allowed = season.stats[season.opponents, weeks] * season.played[..., None]
+
+            self._week_tables = {'offense': season.stats, 'defense': allowed, 'gp': season.played}
+            self._prefix = {}
+            for side, table in self._week_tables.items():
+                cum = np.zeros((table.shape[0], table.shape[1] + 1) + table.shape[2:], dtype=np.int64)
+                np.cumsum(table, axis=1, out=cum[:, 1:])
+                self._prefix[side] = cum
+            
+            self._prefix['allowed'] = allowed
+            self._prefix['last_week'] = np.where(season.played, season.weeks, 0).max(axis=1)
+        
+        return self._prefix
+
+
+
+    def week_table(self, side_of_the_ball: str) -> np.ndarray:
+        """
+        Team x week x stat rows for one side of the ball: a team's own stats on
+        offense, what its opponents put up against it on defense.
+        """
+        return self.season.stats if side_of_the_ball == 'offense' else self._prefix_sums()['allowed']
+
+
+
+    def _week_totals(self, start_week: int, end_week: int, custom_range: set[int]) -> dict[str, np.ndarray]:
+        season = self.season
+        prefix = self._prefix_sums()
+
+        if custom_range is None:
+            lo = np.searchsorted(season.weeks, start_week, 'left') if start_week is not None else 0
+            hi = np.searchsorted(season.weeks, end_week, 'right') if end_week is not None else len(season.weeks)
+            hi = max(lo, hi)
+            return {side: prefix[side][:, hi] - prefix[side][:, lo] for side in self._week_tables}
+        
+        # Arbitrary week sets are a masked reduction over every team at once
+        mask = self._in_week_range(start_week, end_week, custom_range).astype(np.int64)
+        return {side: np.tensordot(mask, table, axes=([0], [1])) for side, table in self._week_tables.items()}
+
+
+
     def grab_stats(self, teams: list[str] = None, side_of_the_ball: str = None, stat_type: set[str] = None, start_week: int = None, end_week: int = None, custom_range: set[int] = None, apply_extra: bool = True) -> dict[str, dict[str, int]]:
-        teams = teams if teams is not None else list(self.year_stats.keys())
-        stat_type = stat_type if stat_type is not None else self.year_stats[teams[0]]['2'].keys()
+        teams = teams if teams is not None else self.season.teams
+        stat_type = stat_type if stat_type is not None else self.season.categories.keys()
+        columns = self.season.stat_columns(stat_type)
+        sides = ['offense', 'defense'] if side_of_the_ball is None else [side_of_the_ball]
+        totals = self._week_totals(start_week, end_week, custom_range)
+        last_week = self._prefix_sums()['last_week']
         returned_stats = {}
 
         for team in teams:
-            if start_week is not None:
-                max_week = max(list(map(int, self.year_stats[team].keys())))
-                if start_week > max_week:
-                    continue
+            t = self.season.team_index[team]
+            if start_week is not None and start_week > last_week[t]:
+                continue
 
             returned_stats[team] = {}
-            game_count = 0
-            for week in self.year_stats[team]:
-                
-                if not self._in_week_range(int(week), start_week, end_week,custom_range):
-                    continue
-                
-                game_count += 1
-                look_at = self._which_stats(team, week, side_of_the_ball, returned_stats)
+            game_count = int(totals['gp'][t])
+            if game_count == 0:
+                continue
 
-                week_stats = self._add_stats(team, look_at, week, stat_type)
-
-                self.combine_stats(returned_stats[team], week_stats)
-
-            if 'offense' in returned_stats[team]:
-                returned_stats[team]['offense']['gp'] = game_count 
-            
-            if 'defense' in returned_stats[team]:
-                returned_stats[team]['defense']['gp'] = game_count
+            for side in sides:
+                returned_stats[team][side] = self._add_stats(totals[side][t, columns].tolist(), columns)
+                returned_stats[team][side]['gp'] = game_count
 
         if apply_extra:
-            self._apply_special_stats(returned_stats, stat_type)
+            self._apply_special_stats_batch(returned_stats, stat_type, totals, sides, columns)
         
         if side_of_the_ball is None:
             self.add_records(returned_stats.keys(), returned_stats, start_week, end_week, custom_range)
@@ -220,57 +523,88 @@ class Stats:
 
 
     def grab_stats_per_week(self, teams: list[str] = None, side_of_the_ball: str = None, stat_type: set[str] = None, start_week: int = None, end_week: int = None, custom_range: set[int] = None, apply_extra: bool = False) -> dict[int, list[int]]:
-        teams = [teams] if teams is not None else list(self.year_stats.keys())
+        teams = [teams] if teams is not None else list(self.season.teams)
         if len(teams[0]) > 3:
             teams[0] = teams[0][:3]
 
-        stat_type = stat_type if stat_type is not None else self.year_stats[teams[0]]['2'].keys()
+        stat_type = stat_type if stat_type is not None else self.season.categories.keys()
+        columns = self.season.stat_columns(stat_type)
         returned_stats = {}
         per_week = True
 
+        use_derived = apply_extra and set(self.season.categories) <= set(stat_type)
+        if use_derived:
+            derived_names, derived_values = self.derived_stats()
+
         for team in teams:
-            if start_week is not None:
-                max_week = max(list(map(int, self.year_stats[team].keys())))
-                if start_week > max_week:
-                    continue
+            weeks = self._team_weeks(team, start_week, end_week, custom_range)
+            if weeks is None:
+                continue
             
             returned_stats[team] = {}
-            for week in self.year_stats[team]:
-                
-                if not self._in_week_range(int(week), start_week, end_week,custom_range):
-                    continue
-                
-                look_at = self._which_stats(team, week, side_of_the_ball, returned_stats, per_week)
+            week_numbers = self.season.weeks[weeks].tolist()
+            look_at = {side: rows[:, columns].tolist() for side, rows in self._which_stats(team, weeks, side_of_the_ball).items()}
 
-                returned_stats[team][week] = self._add_stats(team, look_at, week, stat_type)
+            for i, week in enumerate(week_numbers):
+                returned_stats[team][str(week)] = {side: self._add_stats(rows[i], columns) for side, rows in look_at.items()}
+
+            if use_derived:
+                for side, rows in self._which_stats(team, weeks, side_of_the_ball, derived_values).items():
+                    names = derived_names if side == 'offense' else ['sdrs' if name == 'sors' else name for name in derived_names]
+                    for week, row in zip(week_numbers, rows.tolist()):
+                        returned_stats[team][str(week)][side].update(zip(names, row))
         
-        if apply_extra:
+        if apply_extra and not use_derived:
             self._apply_special_stats(returned_stats, stat_type, per_week)
         
         return returned_stats
 
     
 
-def team_rankins(start_year: int, end_year: int, start_week: int, end_week: int) -> None:
-    teams = None
-    side_of_the_ball = None
-    stat_type = { 'passing', 'rushing', 'pressure', 'scoring' }
-    custom_range = None
-    total_stats = {}
+RANKING_STAT_TYPE = { 'passing', 'rushing', 'pressure', 'scoring' }
+
+
+
+def _season_team_rankings(year: int, start_week: int, end_week: int, stat_type: set[str], custom_range: set[int]) -> dict[str, np.ndarray]:
+    returned_stats = get_season(year).grab_stats(stat_type=stat_type, start_week=start_week, end_week=end_week, custom_range=custom_range)
+    return Display().team_ranking_columns(returned_stats, year)
 
-    for year in range(start_year, end_year + 1):
-        stats = Stats(year)
 
-        returned_stats = stats.grab_stats(teams=teams, side_of_the_ball=side_of_the_ball, stat_type=stat_type, start_week=start_week, end_week=end_week, custom_range=custom_range)
-        total_stats[year] = returned_stats
+
+def team_rankings(start_year: int, end_year: int, start_week: int = None, end_week: int = None, stat_type: set[str] = None, custom_range: set[int] = None, workers: int = None) -> pd.DataFrame:
+    """
+    Rank every team-season from start_year to end_year in one typed DataFrame,
+    sorted by Team STRS.
+
+    Args:
+        start_year: First season to rank
+        end_year: Last season to rank (inclusive)
+        start_week: First week of the window (default: season start)
+        end_week: Last week of the window (default: season end)
+        stat_type: Stat categories to rate on (default: passing, rushing, pressure and scoring)
+        custom_range: Only count these weeks
+        workers: Number of worker processes; 1 ranks in this process (default: one per CPU)
+        
+    Returns:
+        DataFrame with the `Display.display_team_rankings` columns
+    """
+    years = list(range(start_year, end_year + 1))
+    rank_season = partial(_season_team_rankings, start_week=start_week, end_week=end_week, stat_type=stat_type or RANKING_STAT_TYPE, custom_range=custom_range)
+
+    if workers == 1 or len(years) == 1:
+        seasons = [rank_season(year) for year in years]
+    else:
+        with mp.Pool(min(workers or mp.cpu_count(), len(years))) as pool:
+            seasons = pool.map(rank_season, years)
     
-    big_list = []
-    view = Display()
-    for year in total_stats:
-        big_list = big_list + view.create_team_rankings(total_stats[year], side_of_the_ball, year)
+    rankings = Display().team_rankings_frame(seasons)
+    return rankings.sort_values("Team STRS", ascending=False, kind="stable", ignore_index=True)
 
-    big_list.sort(key=lambda x: x[6], reverse=True)
-    view.display_team_rankings(big_list)
+
+
+def team_rankins(start_year: int, end_year: int, start_week: int, end_week: int) -> None:
+    view = Display()
+    view.display_team_rankings(team_rankings(start_year, end_year, start_week, end_week))
 
 
 
@@ -0,0 +1,187 @@
+import copy
+import numpy as np
+import pandas as pd
+
+from playoff_bracket import generate_playoff_bracket, get_round_matchups, update_bracket
+from win_matrix import WinMatrix
+
+
+
+def play_bracket(bracket: dict, matrix: WinMatrix, rng: np.random.Generator) -> dict:
+    """
+    Play every round of a bracket in place, drawing each game's winner from
+    the pairwise win probabilities in `matrix`.
+    """
+    for rnd in range(1, bracket["num_rounds"] + 1):
+        for idx, game in enumerate(get_round_matchups(bracket, rnd)):
+            if game["winner"] is not None or game["team1"] is None or game["team2"] is None:
+                continue
+
+            winner = game["team1"] if rng.random() < matrix.p(game["team1"], game["team2"]) else game["team2"]
+            update_bracket(bracket, rnd, idx, winner)
+
+    return bracket
+
+
+
+def round_fields(bracket: dict) -> list[set[str]]:
+    """
+    The teams in each round of a played bracket, whether playing or holding a
+    bye, followed by the champion.
+    """
+    fields = []
+    for rnd in range(1, bracket["num_rounds"] + 1):
+        played = bracket["rounds"][rnd]
+        field = {team for matchup in played["matchups"] for team in (matchup["team1"], matchup["team2"]) if team}
+        field.update(team for team, _ in played["teams_with_byes"])
+        fields.append(field)
+
+    final = bracket["rounds"][bracket["num_rounds"]]["matchups"]
+    fields.append({final[0]["winner"]} if final and final[0]["winner"] else set())
+    return fields
+
+
+
+def simulate_tournament(conferences: dict, byes_per_conf: dict, matrix: WinMatrix, brackets: int = 10_000, seed: int = None) -> pd.DataFrame:
+    """
+    Play `brackets` complete brackets and count how often every team-season
+    gets through each round. Brackets are always reseeded, since
+    `update_bracket` only fills later rounds by reseeding.
+
+    Args:
+        conferences: Conferences as for `generate_playoff_bracket`
+        byes_per_conf: Byes per conference as for `generate_playoff_bracket`
+        matrix: Win probabilities covering every team in the bracket
+        brackets: Number of brackets to play
+        seed: Seed of the draws
+
+    Returns:
+        One row per team with its probability of reaching every round and of
+        winning the title, sorted by title probability
+    """
+    base = generate_playoff_bracket(copy.deepcopy(conferences), byes_per_conf, reseed=True)
+    teams = list(base["team_info"])
+    index = {team: i for i, team in enumerate(teams)}
+    counts = np.zeros((len(teams), base["num_rounds"] + 1), dtype=np.int64)
+    rng = np.random.default_rng(seed)
+
+    for _ in range(brackets):
+        bracket = play_bracket(copy.deepcopy(base), matrix, rng)
+        for rnd, field in enumerate(round_fields(bracket)):
+            counts[[index[team] for team in field], rnd] += 1
+
+    columns = [f"round_{rnd}" for rnd in range(1, base["num_rounds"] + 1)] + ["champion"]
+    odds = pd.DataFrame(counts / brackets, index=pd.Index(teams, name="team"), columns=columns)
+    return odds.sort_values(["champion"] + columns[::-1], ascending=False)
+
+
+
+def _seed_pairs(field: list[int], seeds: list[int]) -> tuple[list[tuple[int, int]], list[int]]:
+    """
+    `reseed_round` pairing of one conference: highest seed against lowest,
+    with the middle team of an odd field advancing without a game.
+    """
+    ordered = sorted(field, key=lambda team: seeds[team])
+    pairs = [(ordered[i], ordered[-(i + 1)]) for i in range(len(ordered) // 2)]
+    autos = [ordered[len(ordered) // 2]] if len(ordered) % 2 == 1 else []
+    return pairs, autos
+
+
+
+def _play_round(fields: dict[frozenset, float], pairing, probability: np.ndarray) -> dict[frozenset, float]:
+    """
+    Advance a distribution over fields by one round, one game at a time, so
+    the winners' sets are merged as they are built.
+    """
+    survivors = {}
+    for field, chance in fields.items():
+        pairs, autos = pairing(field)
+        outcomes = {frozenset(autos): chance}
+
+        for team1, team2 in pairs:
+            p = probability[team1, team2]
+            played = {}
+            for winners, q in outcomes.items():
+                for winner, q_winner in ((team1, q * p), (team2, q * (1 - p))):
+                    if q_winner > 0:
+                        key = winners | {winner}
+                        played[key] = played.get(key, 0.0) + q_winner
+            outcomes = played
+
+        for winners, q in outcomes.items():
+            survivors[winners] = survivors.get(winners, 0.0) + q
+
+    return survivors
+
+
+
+def exact_tournament(conferences: dict, byes_per_conf: dict, matrix: WinMatrix) -> pd.DataFrame:
+    """
+    Exact version of `simulate_tournament` for a reseeded bracket.
+
+    Conferences are played apart until the final, so each one is a
+    distribution over its possible sets of surviving teams, advanced round by
+    round with the `generate_playoff_bracket` first round (byes included) and
+    `reseed_round` pairings after it. The final combines the conferences and
+    plays the two best remaining seeds. The cost grows with the number of
+    reachable survivor sets, which stays small for conferences of up to 16.
+
+    Returns:
+        The same table as `simulate_tournament`, with exact probabilities
+    """
+    bracket = generate_playoff_bracket(copy.deepcopy(conferences), byes_per_conf, reseed=True)
+    teams = list(bracket["team_info"])
+    index = {team: i for i, team in enumerate(teams)}
+    seeds = [bracket["team_info"][team][0] for team in teams]
+    conference_of = [bracket["team_info"][team][1] for team in teams]
+    order = [matrix.index[team] for team in teams]
+    probability = matrix.probability[np.ix_(order, order)]
+
+    num_rounds = bracket["num_rounds"]
+    reach = np.zeros((len(teams), num_rounds + 1))
+
+    # Round 1 is played as generated, with bye teams carried into round 2
+    first_round = bracket["rounds"][1]
+    distributions = {}
+    for conf in bracket["conferences"]:
+        pairs = [(index[m["team1"]], index[m["team2"]]) for m in first_round["matchups"] if m["conference"] == conf and m["team2"]]
+        autos = [index[m["winner"]] for m in first_round["matchups"] if m["conference"] == conf and not m["team2"]]
+        autos += [index[team] for team, team_conf in first_round["teams_with_byes"] if team_conf == conf]
+        field = frozenset(i for i in range(len(teams)) if conference_of[i] == conf)
+
+        reach[list(field), 0] = 1.0
+        if num_rounds > 1:
+            distributions[conf] = _play_round({field: 1.0}, lambda _, pairs=pairs, autos=autos: (pairs, autos), probability)
+
+    for rnd in range(2, num_rounds):
+        for conf, fields in distributions.items():
+            for field, chance in fields.items():
+                reach[list(field), rnd - 1] += chance
+            distributions[conf] = _play_round(fields, lambda field: _seed_pairs(field, seeds), probability)
+
+    if num_rounds == 1:
+        for m in first_round["matchups"]:
+            if m["team2"]:
+                p = probability[index[m["team1"]], index[m["team2"]]]
+                reach[index[m["team1"]], 1] += p
+                reach[index[m["team2"]], 1] += 1 - p
+    else:
+        # Final: every remaining team, conference by conference, best two seeds play
+        finals = {(): 1.0}
+        for conf in bracket["conferences"]:
+            finals = {remaining + tuple(sorted(field, key=lambda team: seeds[team])): chance * q for remaining, chance in finals.items() for field, q in distributions[conf].items()}
+
+        for remaining, chance in finals.items():
+            finalists = sorted(remaining, key=lambda team: seeds[team])[:2]
+            if len(finalists) < 2:
+                continue
+
+            team1, team2 = finalists
+            p = probability[team1, team2]
+            reach[[team1, team2], num_rounds - 1] += chance
+            reach[team1, num_rounds] += chance * p
+            reach[team2, num_rounds] += chance * (1 - p)
+
+    columns = [f"round_{rnd}" for rnd in range(1, num_rounds + 1)] + ["champion"]
+    odds = pd.DataFrame(reach, index=pd.Index(teams, name="team"), columns=columns)
+    return odds.sort_values(["champion"] + columns[::-1], ascending=False)
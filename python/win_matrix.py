@@ -0,0 +1,106 @@
+import json
+import numpy as np
+import multiprocessing as mp
+
+from simulate import Simulate
+
+MATRIX_PATH = "npz/win_matrix_{year}.npz"
+RATINGS_PATH = "json/ratings_{year}.json"
+
+
+
+class WinMatrix:
+    """
+    Head-to-head results for every pair of a pool of team-seasons.
+
+    `wins[i, j]` is how many of the `games` between `teams[i]` and `teams[j]`
+    team i won and `ties[i, j]` how many were tied, so `probability[i, j]` is
+    the chance i beats j, counting a tie as half a win.
+    """
+
+    def __init__(self, teams: list[str], wins: np.ndarray, ties: np.ndarray, games: int):
+        self.teams = list(teams)
+        self.wins = wins
+        self.ties = ties
+        self.games = games
+        self.index = {team: i for i, team in enumerate(self.teams)}
+
+        self.probability = (wins + 0.5 * ties) / games if games else np.full(wins.shape, 0.5)
+        np.fill_diagonal(self.probability, 0.5)
+
+
+
+    @classmethod
+    def simulate(cls, teams: list[str], games: int, seed: int = None, workers: int = None, simulate: Simulate = None) -> "WinMatrix":
+        """
+        Play `games` games for every pair of `teams` ("KAN-2007" ids), with the
+        first team of each pair at home.
+        """
+        owns_simulate = simulate is None
+        simulate = Simulate() if owns_simulate else simulate
+        n = len(teams)
+        first, second = np.triu_indices(n, k=1)
+
+        ids = [(team[:3], int(team[4:])) for team in teams]
+        pairs = [ids[i] + ids[j] for i, j in zip(first.tolist(), second.tolist())]
+        try:
+            counts = simulate.simulate_pairs(pairs, games, seed, workers)
+        finally:
+            if owns_simulate:
+                simulate.close()
+
+        wins = np.zeros((n, n), dtype=np.int64)
+        ties = np.zeros((n, n), dtype=np.int64)
+        wins[first, second] = counts[:, 0]
+        wins[second, first] = counts[:, 1]
+        ties[first, second] = ties[second, first] = counts[:, 2]
+
+        return cls(teams, wins, ties, games)
+
+
+
+    def p(self, team1: str, team2: str) -> float:
+        return float(self.probability[self.index[team1], self.index[team2]])
+
+
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, teams=np.array(self.teams), wins=self.wins, ties=self.ties, games=self.games)
+
+
+
+    @classmethod
+    def load(cls, path: str) -> "WinMatrix":
+        with np.load(path) as data:
+            return cls(data['teams'].tolist(), data['wins'], data['ties'], int(data['games']))
+
+
+
+def pool_teams(year: int) -> list[str]:
+    with open(RATINGS_PATH.format(year=year), "r") as j:
+        return list(json.load(j).keys())
+
+
+
+def build_pool_matrix(year: int, games: int = 10_000, seed: int = None, workers: int = None) -> WinMatrix:
+    """
+    Simulate and save the win matrix of the `json/ratings_{year}.json` pool.
+    """
+    matrix = WinMatrix.simulate(pool_teams(year), games, seed, workers)
+    matrix.save(MATRIX_PATH.format(year=year))
+    return matrix
+
+
+
+def load_pool_matrix(year: int) -> WinMatrix:
+    return WinMatrix.load(MATRIX_PATH.format(year=year))
+
+
+
+if __name__ == '__main__':
+    year = 2021
+    matrix = build_pool_matrix(year, 10_000, seed=0, workers=mp.cpu_count())
+
+    strength = matrix.probability.mean(axis=1)
+    for rank, i in enumerate(np.argsort(-strength), start=1):
+        print(f"{rank}. {matrix.teams[i]} (Average win probability: {strength[i]:.3f})")